@@ -0,0 +1,180 @@
+from typing import Dict, Tuple
+import importlib.util
+import json
+import os
+import re
+import secrets as secrets_lib
+import statistics
+import tempfile
+import time
+
+import click
+
+exporter_path = os.path.join(os.path.dirname(__file__), '..', 'servers', 'monitoring', 'cgroup_exporter',
+                             'exporter.py')
+
+
+def load_exporter():
+    # The exporter is a standalone script of the monitoring stack and not part of a package
+    spec = importlib.util.spec_from_file_location("cgroup_exporter", exporter_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Devices of the fake io.stat files
+fake_devices = ("8:0", "8:16")
+
+label_pattern = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def build_fake_tree(root: str, container_count: int, foreign_count: int) -> Tuple[str, Dict[str, int]]:
+    """
+    Creates a cgroup v2 tree of docker containers (systemd driver layout) and the docker containers directory with
+    their config.v2.json files, returns the path of the containers directory and the container ids by index
+    """
+    slice_directory = os.path.join(root, "system.slice")
+    os.makedirs(slice_directory)
+    containers_directory = os.path.join(root, "containers")
+    container_ids = {}
+
+    for index in range(container_count + foreign_count):
+        container_id = secrets_lib.token_hex(32)
+        container_ids[container_id] = index
+        cgroup = os.path.join(slice_directory, f"docker-{container_id}.scope")
+        os.makedirs(cgroup)
+        files = {
+            "cpu.stat": f"usage_usec {index * 1000}\nuser_usec {index * 600}\nsystem_usec {index * 400}\n"
+                        "nr_periods 0\nnr_throttled 0\nthrottled_usec 0\n",
+            "memory.current": f"{(index + 1) * 1024 * 1024}\n",
+            "memory.stat": "".join(f"stat_{stat} {stat}\n" for stat in range(40)) + "inactive_file 4096\n",
+            "io.stat": "".join(f"{device} rbytes={index * 1024 + number} wbytes={index * 2048 + number} "
+                               f"rios={index + number} wios={2 * index + number} dbytes=0 dios=0\n"
+                               for number, device in enumerate(fake_devices))
+        }
+        for file_name, content in files.items():
+            with open(os.path.join(cgroup, file_name), 'w') as cgroup_file:
+                cgroup_file.write(content)
+
+        # Containers which are not started by compose are not exported
+        container_labels = {} if index >= container_count else {
+            "com.docker.compose.project": f"stack_{index % 5}",
+            "com.docker.compose.service": f"service_{index}"
+        }
+        os.makedirs(os.path.join(containers_directory, container_id))
+        with open(os.path.join(containers_directory, container_id, "config.v2.json"), 'w') as config_file:
+            json.dump({"ID": container_id, "Name": f"/container_{index}",
+                       "Config": {"Labels": container_labels, "Env": [f"VARIABLE_{env}=value" for env in range(20)]}},
+                      config_file)
+
+    # Other cgroups of the host which have to be skipped
+    os.makedirs(os.path.join(slice_directory, "ssh.service"))
+
+    return containers_directory, container_ids
+
+
+def parse_samples(output: str) -> Dict[Tuple[str, str, str], Tuple[Dict[str, str], float]]:
+    """Parses the exported samples by (metric, container name, device)"""
+    samples = {}
+    for line in output.splitlines():
+        if line.startswith('#') or '{' not in line:
+            continue
+        metric, _, rest = line.partition('{')
+        label_text, _, value = rest.rpartition('} ')
+        labels = dict(label_pattern.findall(label_text))
+        samples[(metric, labels["name"], labels.get("device", ""))] = (labels, float(value))
+    return samples
+
+
+def check_output(output: str, container_ids: Dict[str, int], container_count: int) -> None:
+    """Checks the exported values and labels against the files of the fake tree"""
+    samples = parse_samples(output)
+    exported_names = {name for _, name, _ in samples}
+    assert exported_names == {f"container_{index}" for index in range(container_count)}, \
+        f"Exported containers differ from the compose containers: {sorted(exported_names)}"
+    assert "ssh.service" not in output
+
+    for container_id, index in container_ids.items():
+        if index >= container_count:
+            continue
+        name = f"container_{index}"
+        labels, cpu = samples[("container_cpu_usage_seconds_total", name, "")]
+        assert labels == {"container_label_com_docker_compose_project": f"stack_{index % 5}",
+                          "container_label_com_docker_compose_service": f"service_{index}",
+                          "id": f"/system.slice/docker-{container_id}.scope",
+                          "name": name}, f"Unexpected labels {labels}"
+
+        expected = {
+            ("container_cpu_usage_seconds_total", ""): index * 1000 / 1e6,
+            ("container_cpu_user_seconds_total", ""): index * 600 / 1e6,
+            ("container_cpu_system_seconds_total", ""): index * 400 / 1e6,
+            ("container_memory_usage_bytes", ""): (index + 1) * 1024 * 1024,
+            # memory.current - inactive_file
+            ("container_memory_working_set_bytes", ""): (index + 1) * 1024 * 1024 - 4096
+        }
+        for number, device in enumerate(fake_devices):
+            expected[("container_fs_reads_bytes_total", device)] = index * 1024 + number
+            expected[("container_fs_writes_bytes_total", device)] = index * 2048 + number
+            expected[("container_fs_reads_total", device)] = index + number
+            expected[("container_fs_writes_total", device)] = 2 * index + number
+
+        for (metric, device), value in expected.items():
+            _, exported = samples[(metric, name, device)]
+            assert exported == value, f"{metric} of {name} {device} is {exported}, expected {value}"
+
+
+class CountingLabels:
+    """Wraps a label source and counts the lookups to show the effect of the label cache"""
+
+    def __init__(self, source):
+        self.source = source
+        self.lookups = 0
+
+    def lookup(self, container_id):
+        self.lookups += 1
+        return self.source.lookup(container_id)
+
+
+@click.command()
+@click.option('--containers', default=50, type=int, help="Number of compose containers in the fake cgroup tree")
+@click.option('--foreign', default=10, type=int, help="Number of containers without compose labels")
+@click.option('--scrapes', default=500, type=int, help="Number of measured scrapes")
+def benchmark(containers, foreign, scrapes):
+    """Checks the exported values and measures the scrape latency of the cgroup exporter against a fake cgroup tree."""
+    exporter = load_exporter()
+
+    with tempfile.TemporaryDirectory() as root:
+        containers_directory, container_ids = build_fake_tree(root, containers, foreign)
+        label_source = CountingLabels(exporter.DockerConfigLabels(containers_directory))
+        collector = exporter.CgroupCollector(root, label_source)
+
+        start = time.perf_counter()
+        output = collector.collect()
+        cold = time.perf_counter() - start
+        check_output(output, container_ids, containers)
+
+        latencies = []
+        for _ in range(scrapes):
+            start = time.perf_counter()
+            collector.collect()
+            latencies.append(time.perf_counter() - start)
+        # The values have to stay correct when the files are re-read through the cached descriptors
+        check_output(collector.collect(), container_ids, containers)
+
+        exported = output.count("\ncontainer_cpu_usage_seconds_total{")
+        quantiles = statistics.quantiles(latencies, n=100)
+        click.secho(f"Fake cgroup tree: {containers} compose containers, {foreign} other containers",
+                    fg='cyan', bold=True)
+        click.echo(f"Exported containers:   {exported}")
+        click.echo(f"Samples per scrape:    {sum(1 for line in output.splitlines() if not line.startswith('#'))}")
+        click.echo(f"Label lookups:         {label_source.lookups} for {scrapes + 2} scrapes")
+        click.echo(f"Cold scrape:           {cold * 1000:.2f} ms")
+        click.echo(f"Warm scrape p50:       {quantiles[49] * 1000:.2f} ms")
+        click.echo(f"Warm scrape p99:       {quantiles[98] * 1000:.2f} ms")
+
+        for container in collector.containers.values():
+            container.close()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Fake docker and compose CLI for 'servers bench'
+Pass it as --docker and --compose. The services and the seconds after 'up' at which they are running and healthy
+are read from the json in FAKE_DOCKER_SERVICES, e.g. {"db": {"running": 0.3, "healthy": 1.0}, "app": {"running": 0.5}}
+Services without 'healthy' have no healthcheck. The start time is stored in the file FAKE_DOCKER_STATE.
+Like 'docker compose up -d', 'up' blocks until every container is running, inspect reports State.StartedAt and a
+healthcheck log like docker does.
+"""
+from datetime import datetime, timezone
+import json
+import os
+import sys
+import time
+
+# Seconds between two healthcheck probes
+probe_interval = 0.5
+# Docker reports times which are never set as zero time
+zero_time = "0001-01-01T00:00:00Z"
+
+
+def docker_time(timestamp: float, utc: bool) -> str:
+    """Formats a timestamp with nanoseconds like docker, StartedAt is in UTC and healthcheck logs in local time"""
+    moment = datetime.fromtimestamp(timestamp, timezone.utc) if utc else datetime.fromtimestamp(timestamp).astimezone()
+    offset = moment.strftime('%z')
+    zone = "Z" if utc else f"{offset[:3]}:{offset[3:]}"
+    return f"{moment.strftime('%Y-%m-%dT%H:%M:%S')}.{round(timestamp % 1 * 1e9) % 10 ** 9:09d}{zone}"
+
+
+def health_log(start: float, elapsed: float, healthy: float) -> list:
+    """Probes every probe_interval seconds which fail until the service is healthy, only the last 5 are kept"""
+    probe_ends = [healthy - probe_interval * count for count in range(3, 0, -1)]
+    probe_ends += [healthy + probe_interval * count for count in range(int((elapsed - healthy) / probe_interval) + 1)]
+    return [{"Start": docker_time(start + end - 0.01, False), "End": docker_time(start + end, False),
+             "ExitCode": 0 if end >= healthy else 1, "Output": ""}
+            for end in probe_ends if 0 < end <= elapsed][-5:]
+
+
+def main():
+    services = json.loads(os.environ["FAKE_DOCKER_SERVICES"])
+    state_file_path = os.environ["FAKE_DOCKER_STATE"]
+    command = sys.argv[1]
+
+    if command == "up":
+        start = time.time()
+        with open(state_file_path, 'w') as state_file:
+            state_file.write(str(start))
+        time.sleep(max(max(timings["running"] for timings in services.values()) - (time.time() - start), 0))
+        return
+
+    if command == "ps":
+        print("\n".join(services))
+        return
+
+    if command == "inspect":
+        with open(state_file_path, 'r') as state_file:
+            start = float(state_file.read())
+        elapsed = time.time() - start
+        containers = []
+        for service in sys.argv[2:]:
+            timings = services[service]
+            started = elapsed >= timings["running"]
+            state = {"Status": "running" if started else "created",
+                     "StartedAt": docker_time(start + timings["running"], True) if started else zero_time}
+            if "healthy" in timings:
+                state["Health"] = {"Status": "healthy" if elapsed >= timings["healthy"] else "starting",
+                                   "Log": health_log(start, elapsed, timings["healthy"])}
+            containers.append({
+                "Name": f"/fake-{service}-1",
+                "Config": {"Image": timings.get("image", f"fake/{service}:1"),
+                           "Labels": {"com.docker.compose.service": service}},
+                "State": state
+            })
+        print(json.dumps(containers))
+        return
+
+    sys.exit(f"Unsupported command {sys.argv[1:]}")
+
+
+if __name__ == '__main__':
+    main()
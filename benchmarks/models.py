@@ -0,0 +1,113 @@
+import secrets as secrets_lib
+import timeit
+import tracemalloc
+
+import click
+
+from configManager.parseServerConfig import Server
+from configManager.secrets.handlers import KV_Server
+
+
+def build_inventory(server_count: int, container_count: int, secret_count: int) -> list:
+    """Builds a synthetic server inventory in the legacy nested dict representation"""
+    servers = []
+    for server_index in range(server_count):
+        containers = []
+        for container_index in range(container_count):
+            # Key names are built at runtime like yaml.safe_load does, so they are not interned by the compiler
+            keys = [f"SECRET_{index}" for index in range(secret_count)]
+            containers.append({
+                "name": f"container_{container_index}",
+                "secrets": {
+                    "public": [{"key": key, "value": secrets_lib.token_hex(32)} for key in keys],
+                    "private": [{"key": key, "value": secrets_lib.token_hex(32)} for key in keys],
+                    "fixed": []
+                }
+            })
+        servers.append({"name": f"server_{server_index}", "containers": containers})
+    return servers
+
+
+def copy_kv_dicts(kv_servers: list) -> list:
+    """Rebuilds the nested dicts while sharing the key and value strings with the source"""
+    return [{"name": server["name"],
+             "containers": [{"name": container["name"],
+                             "secrets": {category: [{"key": pair["key"], "value": pair["value"]} for pair in pairs]
+                                         for category, pairs in container["secrets"].items()}}
+                            for container in server["containers"]]}
+            for server in kv_servers]
+
+
+def to_config_dicts(kv_servers: list) -> list:
+    return [{"name": server["name"],
+             "containers": [{"name": container["name"],
+                             "secrets": {category: [pair["key"] for pair in pairs]
+                                         for category, pairs in container["secrets"].items()}}
+                            for container in server["containers"]]}
+            for server in kv_servers]
+
+
+def measure_memory(factory) -> tuple:
+    tracemalloc.start()
+    result = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def count_dict_secrets(servers: list) -> int:
+    count = 0
+    for server in servers:
+        for container in server["containers"]:
+            for secret in container["secrets"]["public"]:
+                count += len(secret["key"]) + len(secret["value"])
+    return count
+
+
+def count_model_secrets(servers: list) -> int:
+    count = 0
+    for server in servers:
+        for container in server.containers:
+            for key, value in container.secrets.items('public'):
+                count += len(key) + len(value)
+    return count
+
+
+@click.command()
+@click.option('--servers', default=50, type=int, help="Number of synthetic servers")
+@click.option('--containers', default=20, type=int, help="Number of containers per server")
+@click.option('--secrets', default=20, type=int, help="Number of secrets per category and container")
+@click.option('--repeat', default=20, type=int, help="Number of iterations for the access benchmark")
+def benchmark(servers, containers, secrets, repeat):
+    """Compares memory usage and access speed of the legacy dict representation with the slotted models."""
+    raw_inventory = build_inventory(servers, containers, secrets)
+    raw_config = to_config_dicts(raw_inventory)
+
+    dict_config, dict_config_size = measure_memory(lambda: to_config_dicts(raw_inventory))
+    model_config, model_config_size = measure_memory(lambda: [Server.from_dict(server) for server in raw_config])
+    dict_kv, dict_kv_size = measure_memory(lambda: copy_kv_dicts(raw_inventory))
+    model_kv, model_kv_size = measure_memory(lambda: [KV_Server.from_dict(server) for server in raw_inventory])
+
+    # Best of several rounds, as single rounds vary by more than the difference between both representations
+    dict_time = min(timeit.repeat(lambda: count_dict_secrets(dict_kv), number=repeat, repeat=7))
+    model_time = min(timeit.repeat(lambda: count_model_secrets(model_kv), number=repeat, repeat=7))
+
+    click.secho(f"Inventory: {servers} servers x {containers} containers x {secrets} secrets per category",
+                fg='cyan', bold=True)
+    click.echo(f"Server config   dict: {dict_config_size / 1024:10.1f} KiB   "
+               f"model: {model_config_size / 1024:10.1f} KiB   "
+               f"({model_config_size / dict_config_size:.2f}x)")
+    click.echo(f"Secrets (KV)    dict: {dict_kv_size / 1024:10.1f} KiB   "
+               f"model: {model_kv_size / 1024:10.1f} KiB   "
+               f"({model_kv_size / dict_kv_size:.2f}x)")
+    click.echo(f"Secret access   dict: {dict_time * 1000 / repeat:10.2f} ms    "
+               f"model: {model_time * 1000 / repeat:10.2f} ms    "
+               f"({model_time / dict_time:.2f}x)")
+
+    # Make sure both representations describe the same inventory
+    assert [server.to_dict() for server in model_kv] == raw_inventory
+    assert [Server.from_dict(server) for server in dict_config] == model_config
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import tempfile
+
+import click
+
+from configManager.composeFile import compose_file_name
+from configManager.servers.bench import bench, DockerCli
+
+fake_docker_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_docker.py')
+
+# The fake 'up' blocks until the last service is running, so polling alone would time all services alike
+fake_services = {
+    "db": {"running": 0.8, "healthy": 2.0},
+    "redis": {"running": 0.3},
+    "app": {"running": 1.5, "healthy": 3.0}
+}
+
+
+@click.command()
+@click.option('--runs', default=3, type=int, help="Number of bench runs against the fake docker CLI")
+@click.option('--tolerance', default=0.1, type=float,
+              help="Allowed deviation from the fake timings in seconds (the fake CLI needs some time to start)")
+def check(runs, tolerance):
+    """Drives 'servers bench' through a fake docker CLI and checks the measured timings and the history."""
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "fake"))
+        open(os.path.join(root, "fake", compose_file_name), 'w').close()
+        history_file_path = os.path.join(root, "history.jsonl")
+
+        os.environ["FAKE_DOCKER_SERVICES"] = json.dumps(fake_services)
+        os.environ["FAKE_DOCKER_STATE"] = os.path.join(root, "state")
+        fake_command = f"{sys.executable} {fake_docker_path}"
+        docker = DockerCli(fake_command, fake_command, False)
+
+        deviations = []
+        for run in range(runs):
+            # Alternate the recreate setting, runs are only compared with runs of the same setting
+            results = bench("fake", docker, root, history_file_path, run % 2 == 0, 30, 0.05, 5, 5, 0.2, False)
+            for timing in results["fake"]:
+                expected = fake_services[timing.name]
+                for measured, expected_value in ((timing.running, expected["running"]),
+                                                 (timing.healthy, expected.get("healthy", expected["running"]))):
+                    deviation = abs(measured - expected_value)
+                    deviations.append(deviation)
+                    assert deviation <= tolerance, f"{timing} deviates by {deviation:.2f}s from {expected_value}s"
+                assert timing.has_healthcheck == ("healthy" in expected)
+            running = sorted(timing.running for timing in results["fake"])
+            assert len(set(running)) == len(fake_services), f"Services are not timed individually: {running}"
+
+        with open(history_file_path, 'r') as history_file:
+            records = [json.loads(line) for line in history_file]
+        assert [record["recreate"] for record in records] == [run % 2 == 0 for run in range(runs)]
+
+        click.secho(f"\nAll {runs} runs within {tolerance:.2f}s of the fake timings "
+                    f"(max deviation {max(deviations):.3f}s)", fg='bright_green', bold=True)
+
+
+if __name__ == '__main__':
+    check()
@@ -0,0 +1,140 @@
+from typing import List, Dict, Tuple
+import os
+import re
+
+compose_file_name = "docker-compose.yaml"
+
+# Keys after which new service keys are inserted (in order of preference)
+_insert_after_keys = ('restart', 'image')
+
+
+def compose_file_path(root_directory: str, stack: str) -> str:
+    return os.path.join(root_directory, stack, compose_file_name)
+
+
+def find_stacks(root_directory: str) -> List[str]:
+    """Returns the names of all subdirectories of the root directory which contain a compose file"""
+    return sorted(item for item in os.listdir(root_directory)
+                  if os.path.isfile(compose_file_path(root_directory, item)))
+
+
+def _indentation(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _is_content(line: str) -> bool:
+    stripped = line.strip()
+    return len(stripped) > 0 and not stripped.startswith('#')
+
+
+def find_block(lines: List[str], path: List[str]) -> Tuple[int, int, int]:
+    """
+    Finds a nested mapping block (e.g. ['services', 'db']) in the lines of a compose file
+    Returns the index of the key line, the index after the last line of the block and the indentation of its children
+    The text is edited line based so comments and formatting of the compose files are kept
+    """
+    start, end, indent = -1, len(lines), 0
+
+    for key in path:
+        pattern = re.compile(rf"^ {{{indent}}}{re.escape(key)}\s*:")
+        for index in range(start + 1, end):
+            if pattern.match(lines[index]):
+                start = index
+                break
+        else:
+            raise KeyError(f"Could not find '{key}' of {path} in compose file")
+
+        end = start + 1
+        while end < len(lines) and (not _is_content(lines[end]) or _indentation(lines[end]) > indent):
+            end += 1
+        # Do not count trailing blank lines and comments as part of the block
+        while end > start + 1 and not _is_content(lines[end - 1]):
+            end -= 1
+
+        indent = next((_indentation(line) for line in lines[start + 1:end] if _is_content(line)), indent + 2)
+
+    return start, end, indent
+
+
+def set_service_keys(text: str, service: str, values: Dict[str, str]) -> str:
+    """Sets scalar keys of a service, replacing existing values and inserting missing keys after image/restart"""
+    lines = text.split('\n')
+
+    for key, value in values.items():
+        start, end, indent = find_block(lines, ['services', service])
+        new_line = f"{' ' * indent}{key}: {value}"
+        pattern = re.compile(rf"^ {{{indent}}}{re.escape(key)}\s*:")
+
+        existing = [index for index in range(start + 1, end) if pattern.match(lines[index])]
+        if len(existing) > 0:
+            lines[existing[0]] = new_line
+            continue
+
+        insert_at = end
+        for after_key in _insert_after_keys:
+            after_pattern = re.compile(rf"^ {{{indent}}}{re.escape(after_key)}\s*:")
+            after = [index for index in range(start + 1, end) if after_pattern.match(lines[index])]
+            if len(after) > 0:
+                insert_at = after[0] + 1
+                break
+        # Keep keys inserted by earlier iterations together and in order
+        while insert_at < end and any(lines[insert_at].startswith(f"{' ' * indent}{other}:") for other in values):
+            insert_at += 1
+        lines.insert(insert_at, new_line)
+
+    return '\n'.join(lines)
+
+
+def set_service_list(text: str, service: str, key: str, items: List[str]) -> str:
+    """Replaces a list of a service (e.g. its networks) with the given items, adding the key if it is missing"""
+    lines = text.split('\n')
+    service_start, service_end, service_indent = find_block(lines, ['services', service])
+
+    try:
+        start, end, indent = find_block(lines, ['services', service, key])
+        del lines[start + 1:end]
+    except KeyError:
+        start, indent = service_end, service_indent + 2
+        lines.insert(start, f"{' ' * service_indent}{key}:")
+
+    lines[start + 1:start + 1] = [f"{' ' * indent}- {item}" for item in items]
+    return '\n'.join(lines)
+
+
+def set_mapping_entries(text: str, path: List[str], entries: Dict[str, List[str]], managed_prefix: str) -> str:
+    """
+    Sets generated entries of a mapping block (e.g. the top level networks)
+    Entries whose name starts with managed_prefix are replaced by the given entries, all other entries are kept
+    The body lines of an entry are indented relative to the entry name
+    """
+    lines = text.split('\n')
+    start, end, indent = find_block(lines, path)
+    pattern = re.compile(rf"^ {{{indent}}}({re.escape(managed_prefix)}[^\s:]*)\s*:")
+
+    index = start + 1
+    while index < end:
+        match = pattern.match(lines[index])
+        if match:
+            _, entry_end, _ = find_block(lines, path + [match.group(1)])
+            del lines[index:entry_end]
+            end -= entry_end - index
+        else:
+            index += 1
+
+    new_lines = []
+    for name, body in entries.items():
+        new_lines.append(f"{' ' * indent}{name}:")
+        new_lines.extend(f"{' ' * (indent + 2)}{line}" for line in body)
+    lines[end:end] = new_lines
+
+    return '\n'.join(lines)
+
+
+def read_compose_text(root_directory: str, stack: str) -> str:
+    with open(compose_file_path(root_directory, stack), 'r') as compose_file:
+        return compose_file.read()
+
+
+def write_compose_text(root_directory: str, stack: str, text: str) -> None:
+    with open(compose_file_path(root_directory, stack), 'w') as compose_file:
+        compose_file.write(text)
@@ -0,0 +1,27 @@
+import click
+
+from .. import default_root_directory
+from .scrapeConfig import generate_scrape_config
+
+
+@click.command()
+@click.option('--write', default=False, type=bool,
+              help="Write prometheus.yml and the network attachments of the monitoring compose file")
+@click.option('--debug', default=False, type=bool)
+def scrape_config(write, debug):
+    """Generate the prometheus scrape config from the compose labels within the scrape budget."""
+    click.echo("\n")
+    generate_scrape_config(default_root_directory, write, debug)
+
+
+# Define the CLI group
+@click.group()
+def cli():
+    pass
+
+
+# Add the Click commands to the CLI group
+cli.add_command(scrape_config)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,275 @@
+from typing import List, Dict, Tuple, Optional
+import os
+
+from schema import Schema, SchemaError, And, Use, Optional as OptionalSchema
+import click
+import yaml
+
+from ..composeFile import find_stacks, read_compose_text, write_compose_text, set_service_list, \
+    set_mapping_entries
+from ..parseServerConfig import FrozenModel
+from ..utils import parse_duration
+
+monitoring_stack = "monitoring"
+prometheus_service = "prometheus"
+budget_file_name = "scrape-budget.yaml"
+prometheus_config_file_name = "prometheus.yml"
+
+# Compose labels which mark a service as scrape target, e.g. prometheus.scrape=true and prometheus.port=9100
+label_prefix = "prometheus."
+
+# Networks generated for prometheus to reach targets of other stacks
+generated_network_prefix = "scrape_"
+
+# Define the schema of the scrape budget file
+budget_schema = {
+    "samples_per_second": And(Use(float), lambda value: value > 0),
+    OptionalSchema("retention", default="15d"): str,
+    OptionalSchema("bytes_per_sample", default=1.5): Use(float),
+    OptionalSchema("scrape_timeout", default="10s"): str,
+    OptionalSchema("intervals", default=["15s", "30s", "60s", "120s"]): [str],
+    # --query.lookback-delta of prometheus, instant queries only see series with a sample within this window
+    OptionalSchema("lookback_delta", default="5m"): str,
+    OptionalSchema("default_series", default=1000): int,
+    OptionalSchema("cross_stack_host", default="{stack}-{service}-1"): str
+}
+
+header = ("# Generated by 'python -m configManager.monitoring scrape-config' from the prometheus.* labels of the\n"
+          "# compose services and scrape-budget.yaml. Changes made by hand are overwritten.\n")
+
+
+class ScrapeTarget(FrozenModel):
+    __slots__ = ('stack', 'service', 'job', 'address', 'path', 'series', 'min_interval', 'max_interval', 'priority',
+                 'networks')
+
+    def __init__(self, stack: str, service: str, job: str, address: str, path: str, series: int, min_interval: int,
+                 max_interval: Optional[int], priority: float, networks: Tuple[str, ...]):
+        self._init_slot('stack', stack)
+        self._init_slot('service', service)
+        self._init_slot('job', job)
+        self._init_slot('address', address)
+        self._init_slot('path', path)
+        self._init_slot('series', series)
+        self._init_slot('min_interval', min_interval)
+        self._init_slot('max_interval', max_interval)
+        self._init_slot('priority', priority)
+        self._init_slot('networks', networks)
+
+
+def load_budget(root_directory: str) -> dict:
+    budget_file_path = os.path.join(root_directory, monitoring_stack, budget_file_name)
+    try:
+        with open(budget_file_path, 'r') as budget_file:
+            budget = Schema(budget_schema).validate(yaml.safe_load(budget_file))
+    except SchemaError as e:
+        click.secho(f"'{budget_file_name}' validation failed in {budget_file_path}.", fg='red', err=True, bold=True)
+        raise e
+
+    # A series whose last sample is older than the lookback delta disappears from queries and graphs, half of it
+    # leaves room for one failed scrape
+    lookback_delta = parse_duration(budget["lookback_delta"])
+    too_slow = [interval for interval in budget["intervals"] if parse_duration(interval) > lookback_delta / 2]
+    if len(too_slow) > 0:
+        click.secho(f"The intervals {too_slow} in {budget_file_path} exceed half of the lookback delta of "
+                    f"{budget['lookback_delta']}, series scraped this slowly have gaps in queries.", fg='red',
+                    err=True, bold=True)
+        raise ValueError(f"Scrape intervals {too_slow} are too slow for the lookback delta")
+    return budget
+
+
+def _labels(service_config: dict) -> Dict[str, str]:
+    labels = service_config.get("labels") or {}
+    if isinstance(labels, list):
+        labels = dict(label.split('=', 1) if '=' in label else (label, '') for label in labels)
+    return {str(key): str(value) for key, value in labels.items()}
+
+
+def _networks(service_config: dict) -> Tuple[str, ...]:
+    # Services without explicit networks are attached to the default network of their project
+    return tuple(service_config.get("networks") or ["default"])
+
+
+def load_compose(root_directory: str, stack: str) -> dict:
+    return yaml.safe_load(read_compose_text(root_directory, stack)) or {}
+
+
+def discover_targets(root_directory: str, budget: dict, debug: bool) -> List[ScrapeTarget]:
+    """Collects all compose services labelled with prometheus.scrape=true"""
+    targets = []
+    for stack in find_stacks(root_directory):
+        for service, service_config in (load_compose(root_directory, stack).get("services") or {}).items():
+            labels = _labels(service_config or {})
+            if labels.get(f"{label_prefix}scrape", "false").lower() != "true":
+                continue
+
+            if f"{label_prefix}port" not in labels:
+                click.secho(f"Skipping {stack}-{service}. Label {label_prefix}port is missing.", fg='yellow',
+                            bold=True)
+                continue
+
+            # Targets of other stacks are reached by container name, as service names are not unique across stacks
+            host = service if stack == monitoring_stack else budget["cross_stack_host"].format(stack=stack,
+                                                                                               service=service)
+            target = ScrapeTarget(
+                stack=stack,
+                service=service,
+                job=labels.get(f"{label_prefix}job", f"{stack}_{service}"),
+                address=f"{host}:{labels[f'{label_prefix}port']}",
+                path=labels.get(f"{label_prefix}path", "/metrics"),
+                series=int(labels.get(f"{label_prefix}series", budget["default_series"])),
+                min_interval=parse_duration(labels.get(f"{label_prefix}min_interval", budget["intervals"][0])),
+                # Jobs whose metrics are queried with rate() windows must not be scraped slower than the window allows
+                max_interval=parse_duration(labels[f"{label_prefix}max_interval"])
+                if f"{label_prefix}max_interval" in labels else None,
+                priority=float(labels.get(f"{label_prefix}priority", 1)),
+                networks=_networks(service_config)
+            )
+            if debug:
+                click.secho(f"Found scrape target {target}")
+            targets.append(target)
+    return targets
+
+
+def group_jobs(targets: List[ScrapeTarget]) -> Dict[str, List[ScrapeTarget]]:
+    """Groups the targets by job, all targets of a job have to share the metrics path of the scrape config"""
+    jobs: Dict[str, List[ScrapeTarget]] = {}
+    for target in targets:
+        jobs.setdefault(target.job, []).append(target)
+
+    for job, job_targets in jobs.items():
+        paths = {target.path for target in job_targets}
+        if len(paths) > 1:
+            click.secho(f"The targets of job {job} use different {label_prefix}path labels: "
+                        f"{', '.join(f'{target.stack}-{target.service} {target.path}' for target in job_targets)}. "
+                        f"Use the same path or separate {label_prefix}job labels.", fg='red', err=True, bold=True)
+            raise ValueError(f"Targets of job {job} have different metrics paths")
+    return jobs
+
+
+def assign_intervals(jobs: Dict[str, List[ScrapeTarget]], budget: dict) -> Dict[str, int]:
+    """
+    Assigns a scrape interval from the interval ladder to every job so the ingested samples/sec fit the budget
+    Every job starts at its minimum interval, then the job with the highest (priority weighted) sample rate is
+    moved to the next slower interval until the budget is met or all jobs are at their slowest allowed interval
+    (the slowest ladder interval not above the max_interval of the job)
+    """
+    ladder = sorted(parse_duration(interval) for interval in budget["intervals"])
+    series = {job: sum(target.series for target in targets) for job, targets in jobs.items()}
+    priority = {job: max(target.priority for target in targets) for job, targets in jobs.items()}
+    position = {job: next((index for index, interval in enumerate(ladder)
+                           if interval >= max(target.min_interval for target in targets)), len(ladder) - 1)
+                for job, targets in jobs.items()}
+    max_position = {}
+    for job, targets in jobs.items():
+        max_intervals = [target.max_interval for target in targets if target.max_interval is not None]
+        allowed = [index for index, interval in enumerate(ladder)
+                   if len(max_intervals) < 1 or interval <= min(max_intervals)]
+        max_position[job] = max(allowed) if len(allowed) > 0 else 0
+        position[job] = min(position[job], max_position[job])
+
+    while sum(series[job] / ladder[position[job]] for job in jobs) > budget["samples_per_second"]:
+        candidates = [job for job in jobs if position[job] < max_position[job]]
+        if len(candidates) < 1:
+            click.secho(f"The scrape budget of {budget['samples_per_second']:g} samples/sec can not be met even "
+                        f"with the slowest allowed interval of every job.", fg='yellow', bold=True)
+            break
+        slowest = max(candidates, key=lambda job: series[job] / ladder[position[job]] / priority[job])
+        position[slowest] += 1
+
+    return {job: ladder[position[job]] for job in jobs}
+
+
+def _format_interval(seconds: int) -> str:
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+
+def build_prometheus_config(jobs: Dict[str, List[ScrapeTarget]], intervals: Dict[str, int], budget: dict) -> dict:
+    scrape_timeout = parse_duration(budget["scrape_timeout"])
+    scrape_configs = []
+    for job, targets in jobs.items():
+        scrape_configs.append({
+            "job_name": job,
+            "scrape_interval": _format_interval(intervals[job]),
+            "scrape_timeout": _format_interval(min(scrape_timeout, intervals[job])),
+            "metrics_path": targets[0].path,
+            "static_configs": [{"targets": [target.address for target in targets]}]
+        })
+    return {"global": {"scrape_timeout": budget["scrape_timeout"]}, "scrape_configs": scrape_configs}
+
+
+def required_networks(targets: List[ScrapeTarget], prometheus_networks: List[str]) \
+        -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Returns the networks prometheus has to be attached to and the external network definitions for other stacks
+    Targets of the monitoring stack are reached through one of their own networks, targets of other stacks through
+    the default-named network (<project>_<network>) of their stack
+    """
+    networks = [network for network in prometheus_networks if not network.startswith(generated_network_prefix)]
+    external_networks: Dict[str, List[str]] = {}
+
+    for target in targets:
+        if target.stack == monitoring_stack:
+            if target.service != prometheus_service and not set(target.networks) & set(networks):
+                networks.append(target.networks[0])
+            continue
+
+        network_name = f"{generated_network_prefix}{target.stack}_{target.networks[0]}"
+        if network_name not in external_networks:
+            external_networks[network_name] = ["external: true", f"name: {target.stack}_{target.networks[0]}"]
+            networks.append(network_name)
+
+    return networks, external_networks
+
+
+def print_estimates(jobs: Dict[str, List[ScrapeTarget]], intervals: Dict[str, int], budget: dict) -> None:
+    click.secho(f"{'job':<28} {'targets':>7} {'series':>8} {'interval':>8} {'samples/s':>10}", bold=True)
+    total_series, total_rate = 0, 0.0
+    for job, targets in jobs.items():
+        series = sum(target.series for target in targets)
+        rate = series / intervals[job]
+        total_series += series
+        total_rate += rate
+        click.echo(f"{job:<28} {len(targets):>7} {series:>8} {_format_interval(intervals[job]):>8} {rate:>10.1f}")
+
+    retention_days = parse_duration(budget["retention"]) / 86400
+    bytes_per_day = total_rate * budget["bytes_per_sample"] * 86400
+    click.echo(f"\nEstimated head series: {total_series}")
+    click.echo(f"Ingested samples/sec: {total_rate:.1f} (budget {budget['samples_per_second']:g})")
+    click.echo(f"Estimated disk growth: {bytes_per_day / 1024 ** 2:.1f} MiB/day, "
+               f"{bytes_per_day * retention_days / 1024 ** 3:.2f} GiB for a retention of {budget['retention']}")
+
+
+def generate_scrape_config(root_directory: str, write: bool, debug: bool) -> None:
+    budget = load_budget(root_directory)
+    targets = discover_targets(root_directory, budget, debug)
+    if len(targets) < 1:
+        click.secho("No compose service is labelled as scrape target.", fg='yellow', bold=True)
+        return
+
+    jobs = group_jobs(targets)
+    intervals = assign_intervals(jobs, budget)
+    print_estimates(jobs, intervals, budget)
+    click.echo("\n")
+
+    monitoring_compose = load_compose(root_directory, monitoring_stack)
+    prometheus_networks = list(_networks(monitoring_compose["services"][prometheus_service]))
+    networks, external_networks = required_networks(targets, prometheus_networks)
+
+    if not write:
+        click.secho(f"Prometheus networks: {', '.join(networks)}", fg='cyan')
+        click.secho("Run with --write true to update prometheus.yml and the monitoring compose file", fg='cyan')
+        return
+
+    prometheus_config = build_prometheus_config(jobs, intervals, budget)
+    prometheus_config_path = os.path.join(root_directory, monitoring_stack, prometheus_config_file_name)
+    with open(prometheus_config_path, 'w') as prometheus_config_file:
+        prometheus_config_file.write(header)
+        yaml.safe_dump(prometheus_config, prometheus_config_file, sort_keys=False)
+
+    text = read_compose_text(root_directory, monitoring_stack)
+    text = set_service_list(text, prometheus_service, "networks", networks)
+    text = set_mapping_entries(text, ["networks"], external_networks, generated_network_prefix)
+    write_compose_text(root_directory, monitoring_stack, text)
+
+    click.secho(f"Updated {prometheus_config_path} and the networks of {monitoring_stack}", fg='bright_green',
+                bold=True)
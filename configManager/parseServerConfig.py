@@ -1,25 +1,103 @@
 import os
-from typing import TypedDict, Optional, List
+import sys
+from typing import Optional, List, Iterable, Tuple
 
 from schema import Schema, SchemaError, Optional as OptionalSchema
 import click
 import yaml
 
 
-class ContainerSecrets(TypedDict):
-    public: Optional[List[str]]
-    private: Optional[List[str]]
-    fixed: Optional[List[str]]
+def intern_all(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Returns the values as tuple of interned strings so equal key names share one object"""
+    if not values:
+        return ()
+    # Tuples of interned strings (e.g. the keys of the server config) are shared instead of copied
+    if isinstance(values, tuple) and all(sys.intern(value) is value for value in values):
+        return values
+    return tuple(sys.intern(value) for value in values)
 
 
-class Container(TypedDict):
-    name: str
-    secrets: ContainerSecrets
+class FrozenModel:
+    """
+    Base class for the slotted, immutable config models
+    Attributes are only assigned once in __init__ via _init_slot and can not be changed afterwards
+    """
+    __slots__ = ()
+
+    def _init_slot(self, name: str, value) -> None:
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    # Copy and pickle restore the slots directly as __setattr__ is blocked
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __repr__(self):
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ContainerSecrets(FrozenModel):
+    __slots__ = ('public', 'private', 'fixed')
 
+    def __init__(self, public: Iterable[str] = (), private: Iterable[str] = (), fixed: Iterable[str] = ()):
+        self._init_slot('public', intern_all(public))
+        self._init_slot('private', intern_all(private))
+        self._init_slot('fixed', intern_all(fixed))
 
-class Server(TypedDict):
-    name: str
-    containers: List[Container]
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ContainerSecrets':
+        return cls(data.get('public'), data.get('private'), data.get('fixed'))
+
+    def to_dict(self) -> dict:
+        return {"public": list(self.public), "private": list(self.private), "fixed": list(self.fixed)}
+
+
+class Container(FrozenModel):
+    __slots__ = ('name', 'secrets')
+
+    def __init__(self, name: str, secrets: ContainerSecrets):
+        self._init_slot('name', sys.intern(name))
+        self._init_slot('secrets', secrets)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Container':
+        return cls(data["name"], ContainerSecrets.from_dict(data["secrets"]))
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "secrets": self.secrets.to_dict()}
+
+
+class Server(FrozenModel):
+    __slots__ = ('name', 'containers')
+
+    def __init__(self, name: str, containers: Iterable[Container] = ()):
+        self._init_slot('name', sys.intern(name))
+        self._init_slot('containers', tuple(containers))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Server':
+        return cls(data["name"], [Container.from_dict(container) for container in data["containers"]])
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "containers": [container.to_dict() for container in self.containers]}
 
 
 # Define the schema for a single block
@@ -75,25 +153,15 @@ def parse_server_config(directory: str, dirname: str, debug: bool) -> Server:
 
     if server_secrets is not None:
         for container, container_data in server_secrets["env_files"].items():
-            container_secrets_dict: ContainerSecrets = container_data
-            container_dict: Container = {
-                "name": container,
-                "secrets": container_secrets_dict
-            }
-            containers.append(container_dict)
-
-    server: Server = {
-        "name": dirname,
-        "containers": containers
-    }
+            containers.append(Container(container, ContainerSecrets.from_dict(container_data)))
 
-    return server
+    return Server(dirname, containers)
 
 
 def find_servers(root_dir: str, debug: bool) -> List[Server]:
     """
     Finds all Subdirectories in the root dir and assumes they are servers
-    Fetches the configuration files (e.g. secrets) for the server and adds the information into the typed dict
+    Fetches the configuration files (e.g. secrets) for the server and adds the information into the server model
     Returns a list of servers and their retrieved configuration
     """
     directory_items = os.listdir(root_dir)
@@ -0,0 +1,59 @@
+import click
+
+from .. import default_root_directory, all_servers_option
+from ..composeFile import find_stacks
+from ..utils import parse_duration
+from .metrics import fetch_prometheus, load_metrics_file, export_metrics_file, to_samples
+from .recommend import recommend_resources
+
+
+def get_stack_names():
+    stack_names = find_stacks(default_root_directory)
+    stack_names.append(all_servers_option)
+    return stack_names
+
+
+@click.command()
+@click.option('--target', default=all_servers_option, required=True, prompt=True, prompt_required=True,
+              type=click.Choice(get_stack_names()))
+@click.option('--prometheus', default='http://localhost:8084', type=str, help="URL of the prometheus server")
+@click.option('--metrics-file', default=None, type=click.Path(exists=True, dir_okay=False),
+              help="Read exported usage data from this file instead of querying prometheus")
+@click.option('--export', default=None, type=click.Path(dir_okay=False),
+              help="Store the usage data fetched from prometheus in this file for offline use")
+@click.option('--duration', default='14d', type=str, help="Time range to query from prometheus (e.g. 12h, 14d, 2w)")
+@click.option('--step', default='30s', type=str, help="Resolution of the queried samples")
+@click.option('--limit-percentile', default=99.0, type=click.FloatRange(0, 100),
+              help="Usage percentile the limits are derived from")
+@click.option('--reservation-percentile', default=50.0, type=click.FloatRange(0, 100),
+              help="Usage percentile the reservations are derived from")
+@click.option('--headroom', default=0.25, type=click.FloatRange(min=0), help="Relative headroom added to the limits")
+@click.option('--write', default=False, type=bool, help="Write the limits into the compose files")
+@click.option('--debug', default=False, type=bool)
+def recommend(target, prometheus, metrics_file, export, duration, step, limit_percentile, reservation_percentile,
+              headroom, write, debug):
+    """Recommend memory and cpu limits per service from recorded container usage."""
+    click.echo("\n")
+    if metrics_file:
+        results = load_metrics_file(metrics_file)
+    else:
+        results = fetch_prometheus(prometheus, parse_duration(duration), parse_duration(step), debug)
+        if export:
+            export_metrics_file(export, results)
+            click.secho(f"Exported usage data to {export}", fg='green')
+
+    recommend_resources(target, to_samples(results), default_root_directory, limit_percentile,
+                        reservation_percentile, headroom, write, debug)
+
+
+# Define the CLI group
+@click.group()
+def cli():
+    pass
+
+
+# Add the Click commands to the CLI group
+cli.add_command(recommend)
+
+if __name__ == '__main__':
+    cli()
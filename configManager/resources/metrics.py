@@ -0,0 +1,111 @@
+from typing import Dict, Tuple, List
+import json
+import time
+import urllib.parse
+import urllib.request
+
+import click
+import numpy as np
+
+# The cgroup exporter (like cAdvisor) exposes the docker labels of a container prefixed with container_label_
+project_label = "container_label_com_docker_compose_project"
+service_label = "container_label_com_docker_compose_service"
+
+_selector = f'{{{service_label}!=""}}'
+_grouping = f"sum by ({project_label}, {service_label})"
+
+# The rate window needs several samples, the container metrics job is therefore capped with prometheus.max_interval
+queries = {
+    "cpu": f"{_grouping} (rate(container_cpu_usage_seconds_total{_selector}[2m]))",
+    "memory": f"{_grouping} (container_memory_working_set_bytes{_selector})"
+}
+
+# Prometheus refuses range queries with more than 11000 points per series
+max_points_per_query = 10000
+
+# Samples per (project, service) and metric
+ServiceSamples = Dict[str, Dict[Tuple[str, str], np.ndarray]]
+
+
+def _query_range(prometheus_url: str, query: str, start: float, end: float, step: int, debug: bool) -> List[dict]:
+    parameters = urllib.parse.urlencode({"query": query, "start": start, "end": end, "step": step})
+    url = f"{prometheus_url.rstrip('/')}/api/v1/query_range?{parameters}"
+    if debug:
+        click.secho(f"Querying {url}")
+
+    with urllib.request.urlopen(url) as response:
+        body = json.load(response)
+
+    if body.get("status") != "success":
+        raise RuntimeError(f"Prometheus query failed: {body.get('error', body)}")
+    return body["data"]["result"]
+
+
+def fetch_prometheus(prometheus_url: str, duration: int, step: int, debug: bool) -> Dict[str, List[dict]]:
+    """
+    Fetches the cpu and memory usage of all compose services from the prometheus query_range API
+    Long durations are split into several queries to stay below the point limit of prometheus
+    Returns the matrix results per metric in the format of the prometheus API (which is also the export format)
+    """
+    end = time.time()
+    start = end - duration
+    chunk = max_points_per_query * step
+    results = {}
+
+    for metric, query in queries.items():
+        series: Dict[Tuple[str, str], dict] = {}
+        chunk_start = start
+        with click.progressbar(length=int(duration), label=f"Fetching {metric} usage from prometheus") as bar:
+            while chunk_start < end:
+                chunk_end = min(chunk_start + chunk, end)
+                for result in _query_range(prometheus_url, query, chunk_start, chunk_end, step, debug):
+                    key = (result["metric"].get(project_label, ""), result["metric"].get(service_label, ""))
+                    series.setdefault(key, {"metric": result["metric"], "values": []})["values"].extend(
+                        result["values"])
+                bar.update(int(chunk_end - chunk_start))
+                # Prometheus includes both boundaries, so continue one step after the end of this chunk
+                chunk_start = chunk_end + step
+        results[metric] = list(series.values())
+
+    return results
+
+
+def load_metrics_file(metrics_file_path: str) -> Dict[str, List[dict]]:
+    """
+    Loads exported metrics from a file
+    Expects a json object with the keys 'cpu' and 'memory' containing either the matrix results or the full
+    response of the prometheus query_range API
+    """
+    with open(metrics_file_path, 'r') as metrics_file:
+        data = json.load(metrics_file)
+
+    results = {}
+    for metric in queries:
+        if metric not in data:
+            raise ValueError(f"Metrics file {metrics_file_path} does not contain '{metric}' data")
+        metric_data = data[metric]
+        if isinstance(metric_data, dict):
+            metric_data = metric_data["data"]["result"]
+        results[metric] = metric_data
+    return results
+
+
+def export_metrics_file(metrics_file_path: str, results: Dict[str, List[dict]]) -> None:
+    with open(metrics_file_path, 'w') as metrics_file:
+        json.dump(results, metrics_file)
+
+
+def to_samples(results: Dict[str, List[dict]]) -> ServiceSamples:
+    """Converts the matrix results into one float array of sample values per service"""
+    samples: ServiceSamples = {}
+    for metric, series_list in results.items():
+        grouped: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        for series in series_list:
+            key = (series["metric"].get(project_label, ""), series["metric"].get(service_label, ""))
+            if len(series["values"]) < 1:
+                continue
+            # Values are [timestamp, "value"] pairs, only the values are needed
+            values = np.asarray([value for _, value in series["values"]], dtype=np.float64)
+            grouped.setdefault(key, []).append(values[np.isfinite(values)])
+        samples[metric] = {key: np.concatenate(arrays) for key, arrays in grouped.items()}
+    return samples
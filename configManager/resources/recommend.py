@@ -0,0 +1,230 @@
+from typing import List, Dict, Tuple
+import math
+import os
+
+import click
+import numpy as np
+import yaml
+
+from .. import all_servers_option
+from ..composeFile import read_compose_text, write_compose_text, set_service_keys
+from ..parseServerConfig import FrozenModel
+from .metrics import ServiceSamples
+
+mebibyte = 1024 * 1024
+
+# Lower bounds so a mostly idle service can still start and handle spikes
+min_memory_limit = 32 * mebibyte
+min_cpus = 0.1
+
+# Tuned settings (see 'python -m configManager.tune') of memory a service allocates up front, e.g. the InnoDB buffer
+# pool which only fills over time and may not show in the observed working set yet
+reserved_memory_keys = ("INNODB_BUFFER_POOL_SIZE",)
+
+# Size suffixes of mysql and redis settings
+_size_units = {"": 1, "k": 1024, "m": mebibyte, "g": 1024 * mebibyte}
+
+
+class ResourceRecommendation(FrozenModel):
+    """Proposed limits and reservations for a compose service (memory in bytes, cpu in cores)"""
+    __slots__ = ('stack', 'service', 'samples', 'memory_limit', 'memory_reservation', 'cpus', 'cpu_peak',
+                 'memory_peak')
+
+    def __init__(self, stack: str, service: str, samples: int, memory_limit: int, memory_reservation: int,
+                 cpus: float, cpu_peak: float, memory_peak: float):
+        self._init_slot('stack', stack)
+        self._init_slot('service', service)
+        self._init_slot('samples', samples)
+        self._init_slot('memory_limit', memory_limit)
+        self._init_slot('memory_reservation', memory_reservation)
+        self._init_slot('cpus', cpus)
+        self._init_slot('cpu_peak', cpu_peak)
+        self._init_slot('memory_peak', memory_peak)
+
+    def compose_values(self) -> Dict[str, str]:
+        return {
+            "mem_limit": format_memory(self.memory_limit),
+            "mem_reservation": format_memory(self.memory_reservation),
+            "cpus": f"{self.cpus:g}"
+        }
+
+
+def format_memory(value: int) -> str:
+    """Formats bytes in the compose byte format using whole mebibytes"""
+    return f"{math.ceil(value / mebibyte)}m"
+
+
+def percentiles(samples: Dict[Tuple[str, str], np.ndarray],
+                quantiles: List[float]) -> Dict[Tuple[str, str], np.ndarray]:
+    """
+    Computes the percentiles of all services at once (linear interpolation like np.percentile)
+    The sample arrays are padded with NaN into one matrix and sorted row wise in a single call (NaN sorts last),
+    the ranks of every percentile are then derived from the row lengths and interpolated with fancy indexing
+    """
+    keys = [key for key, values in samples.items() if len(values) > 0]
+    if len(keys) < 1:
+        return {}
+
+    lengths = np.array([len(samples[key]) for key in keys])
+    matrix = np.full((len(keys), lengths.max()), np.nan)
+    mask = np.arange(lengths.max()) < lengths[:, None]
+    matrix[mask] = np.concatenate([samples[key] for key in keys])
+    matrix.sort(axis=1)
+
+    # Ranks have the shape (quantiles, services)
+    ranks = np.asarray(quantiles)[:, None] / 100 * (lengths - 1)
+    lower = np.floor(ranks).astype(np.intp)
+    upper = np.minimum(lower + 1, lengths - 1)
+    rows = np.arange(len(keys))
+    lower_values = matrix[rows, lower]
+    result = lower_values + (matrix[rows, upper] - lower_values) * (ranks - lower)
+    return {key: result[:, index] for index, key in enumerate(keys)}
+
+
+def _round_up(value: float, step: float) -> float:
+    return round(math.ceil(value / step) * step, 2)
+
+
+def recommend(samples: ServiceSamples, limit_percentile: float, reservation_percentile: float,
+              headroom: float) -> List[ResourceRecommendation]:
+    quantiles = [limit_percentile, reservation_percentile, 100]
+    cpu = percentiles(samples["cpu"], quantiles)
+    memory = percentiles(samples["memory"], quantiles)
+
+    recommendations = []
+    for key in sorted(set(cpu) & set(memory)):
+        # Compose has no service level cpu reservation, so only the limit is derived for cpu
+        cpu_limit, _, cpu_peak = cpu[key]
+        memory_limit, memory_reservation, memory_peak = memory[key]
+        limit = max(int(memory_limit * (1 + headroom)), min_memory_limit)
+
+        recommendations.append(ResourceRecommendation(
+            stack=key[0],
+            service=key[1],
+            samples=len(samples["memory"][key]),
+            memory_limit=limit,
+            # Docker rejects a reservation above the limit (e.g. with a reservation percentile above the limit one)
+            memory_reservation=min(int(memory_reservation), limit),
+            cpus=max(_round_up(cpu_limit * (1 + headroom), 0.05), min_cpus),
+            cpu_peak=float(cpu_peak),
+            memory_peak=float(memory_peak)
+        ))
+    return recommendations
+
+
+def print_recommendations(recommendations: List[ResourceRecommendation]) -> None:
+    click.secho(f"{'stack':<14} {'service':<26} {'samples':>8} {'mem_limit':>10} {'mem_res':>8} {'mem_peak':>9} "
+                f"{'cpus':>6} {'cpu_peak':>9}", bold=True)
+    for recommendation in recommendations:
+        click.echo(f"{recommendation.stack:<14} {recommendation.service:<26} {recommendation.samples:>8} "
+                   f"{format_memory(recommendation.memory_limit):>10} "
+                   f"{format_memory(recommendation.memory_reservation):>8} "
+                   f"{format_memory(int(recommendation.memory_peak)):>9} "
+                   f"{recommendation.cpus:>6g} {recommendation.cpu_peak:>9.3f}")
+
+
+def write_recommendations(recommendations: List[ResourceRecommendation], root_directory: str, debug: bool) -> None:
+    stacks = sorted({recommendation.stack for recommendation in recommendations})
+    for stack in stacks:
+        try:
+            original_text = read_compose_text(root_directory, stack)
+        except FileNotFoundError:
+            click.secho(f"Skipping {stack}. Could not find its compose file in {root_directory}.", fg='yellow',
+                        bold=True)
+            continue
+
+        text = original_text
+        for recommendation in recommendations:
+            if recommendation.stack != stack:
+                continue
+            try:
+                text = set_service_keys(text, recommendation.service, recommendation.compose_values())
+            except KeyError:
+                click.secho(f"Skipping {stack}-{recommendation.service}. Service is not part of the compose file.",
+                            fg='yellow', bold=True)
+                continue
+            if debug:
+                click.secho(f"Set limits for {stack}-{recommendation.service}: {recommendation.compose_values()}")
+
+        # Services which are all skipped or already have the values leave the compose file untouched
+        if text == original_text:
+            click.secho(f"Resource limits of {stack} are unchanged", fg='cyan')
+            continue
+        write_compose_text(root_directory, stack, text)
+        click.secho(f"Updated resource limits of {stack}", fg='green')
+
+
+def parse_size(value: str) -> int:
+    """Parses sizes like 3072M, 1G or 64mb into bytes"""
+    value = value.strip().lower().removesuffix("b")
+    number, unit = (value[:-1], value[-1]) if value[-1:] in _size_units else (value, "")
+    return int(float(number) * _size_units[unit])
+
+
+def _read_service_env(root_directory: str, stack: str, service: str, debug: bool) -> Dict[str, str]:
+    """Reads the variables of the env files of a service, files which can not be read are skipped"""
+    compose = yaml.safe_load(read_compose_text(root_directory, stack)) or {}
+    env_files = ((compose.get("services") or {}).get(service) or {}).get("env_file") or []
+    if isinstance(env_files, str):
+        env_files = [env_files]
+
+    variables = {}
+    for env_file in env_files:
+        env_file_path = os.path.normpath(os.path.join(root_directory, stack, env_file))
+        try:
+            with open(env_file_path, 'r') as env:
+                for line in env:
+                    key, separator, value = line.strip().partition('=')
+                    if separator and not key.startswith('#'):
+                        variables[key.strip()] = value.strip()
+        except PermissionError:
+            click.secho(f"Could not read {env_file_path} to check the tuned memory of {stack}-{service}. Run as "
+                        f"root to check it.", fg='yellow', bold=True)
+        except FileNotFoundError:
+            if debug:
+                click.secho(f"Skipping {env_file_path} of {stack}-{service}. The env file does not exist.")
+    return variables
+
+
+def check_reserved_memory(recommendations: List[ResourceRecommendation], root_directory: str, debug: bool) -> None:
+    """Warns about memory limits below the memory a service is tuned to allocate"""
+    for recommendation in recommendations:
+        try:
+            variables = _read_service_env(root_directory, recommendation.stack, recommendation.service, debug)
+        except FileNotFoundError:
+            continue
+
+        for key in reserved_memory_keys:
+            if key not in variables:
+                continue
+            reserved = parse_size(variables[key])
+            if recommendation.memory_limit < reserved:
+                click.secho(f"The mem_limit {format_memory(recommendation.memory_limit)} of "
+                            f"{recommendation.stack}-{recommendation.service} is below its {key} of "
+                            f"{variables[key]}. The service will be killed once it fills up, raise the limit or "
+                            f"tune the stack again.", fg='red', bold=True)
+
+
+def filter_recommendations(target: str, recommendations: List[ResourceRecommendation]) \
+        -> List[ResourceRecommendation]:
+    if target == all_servers_option:
+        return recommendations
+    return [recommendation for recommendation in recommendations if recommendation.stack == target]
+
+
+def recommend_resources(target: str, samples: ServiceSamples, root_directory: str, limit_percentile: float,
+                        reservation_percentile: float, headroom: float, write: bool, debug: bool) -> None:
+    recommendations = filter_recommendations(target, recommend(samples, limit_percentile, reservation_percentile,
+                                                               headroom))
+    if len(recommendations) < 1:
+        click.secho(f"No usage data found for {target}.", fg='yellow', bold=True)
+        return
+
+    print_recommendations(recommendations)
+    check_reserved_memory(recommendations, root_directory, debug)
+    click.echo("\n")
+
+    if write:
+        write_recommendations(recommendations, root_directory, debug)
+    else:
+        click.secho("Run with --write true to apply the limits to the compose files", fg='cyan')
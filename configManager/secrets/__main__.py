@@ -12,13 +12,13 @@ from .handlers.handlerManager import handler_names, get_hander_by_name
 
 
 def get_server_names(servers):
-    server_names = [server['name'] for server in servers]
+    server_names = [server.name for server in servers]
     server_names.append(all_servers_option)
     return server_names
 
 def filter_servers(servers):
     """Filters the servers and excludes all servers without a secrets config"""
-    return [server for server in servers if len(server["containers"]) > 0]
+    return [server for server in servers if len(server.containers) > 0]
 
 
 server_config = find_servers(default_root_directory, False)
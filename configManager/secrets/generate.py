@@ -13,10 +13,10 @@ from .handlers import SecretHandler, KV_Server
 def create_env_files(server_secrets: List[KV_Server], root_directory: str, debug: bool) -> None:
     with click.progressbar(server_secrets, label="Creating env files for target secrets", show_pos=True):
         for server in server_secrets:
-            server_path = os.path.join(root_directory, server["name"])
+            server_path = os.path.join(root_directory, server.name)
 
             if not os.path.exists(server_path) or not os.path.isdir(server_path):
-                click.secho(f'Skipping env generation for {server["name"]}. Could not find directory of server.',
+                click.secho(f'Skipping env generation for {server.name}. Could not find directory of server.',
                             fg='yellow', bold=True)
                 continue
 
@@ -25,36 +25,36 @@ def create_env_files(server_secrets: List[KV_Server], root_directory: str, debug
             os.makedirs(secrets_folder)
             subprocess.check_call(['sudo', 'chmod', '700', secrets_folder])
 
-            for container in server["containers"]:
-                env_file_path = os.path.join(secrets_folder, container["name"] + ".env")
+            for container in server.containers:
+                env_file_path = os.path.join(secrets_folder, container.name + ".env")
 
                 with open(env_file_path, 'w') as env_file:
-                    if container["secrets"]["private"] and len(container["secrets"]["private"]) > 0:
+                    if len(container.secrets.private_keys) > 0:
                         env_file.write("# Private\n")
-                        for secret in container["secrets"]["private"]:
-                            env_file.write(f"{secret['key']}={secret['value']}\n")
+                        for key, value in container.secrets.items('private'):
+                            env_file.write(f"{key}={value}\n")
                             env_file.write("\n")
                     elif debug:
                         click.secho(
-                            f"Skipping private secrets for {server['name']}-{container['name']}. No private secrets to write")
+                            f"Skipping private secrets for {server.name}-{container.name}. No private secrets to write")
 
-                    if container["secrets"]["public"] and len(container["secrets"]["public"]) > 0:
+                    if len(container.secrets.public_keys) > 0:
                         env_file.write("# Public\n")
-                        for secret in container["secrets"]["public"]:
-                            env_file.write(f"{secret['key']}={secret['value']}\n")
+                        for key, value in container.secrets.items('public'):
+                            env_file.write(f"{key}={value}\n")
                             env_file.write("\n")
                     elif debug:
                         click.secho(
-                            f"Skipping public secrets for {server['name']}-{container['name']}. No public secrets to write")
+                            f"Skipping public secrets for {server.name}-{container.name}. No public secrets to write")
    
-                    if container["secrets"]["fixed"] and len(container["secrets"]["fixed"]) > 0:
+                    if len(container.secrets.fixed_keys) > 0:
                         env_file.write("# Fixed\n")
-                        for secret in container["secrets"]["fixed"]:
-                            env_file.write(f"{secret['key']}={secret['value']}\n")
+                        for key, value in container.secrets.items('fixed'):
+                            env_file.write(f"{key}={value}\n")
                         env_file.write("\n")
                     elif debug:
                         click.secho(
-                            f"Skipping fixed secrets for {server['name']}-{container['name']}. No fixed secrets to write")
+                            f"Skipping fixed secrets for {server.name}-{container.name}. No fixed secrets to write")
    
 
 def remove_env_files(servers: List[str], root_directory: str, debug: bool) -> None:
@@ -74,13 +74,13 @@ def generate(target: str, handler: SecretHandler, server_config: List[Server], r
              debug: bool) -> None:
     target_servers = filter_server_config_by_target(target, server_config)
 
-    # Cleanup handler and secrets folder 
-    handler.clean(target, root_directory, debug)
-    remove_env_files([server["name"] for server in target_servers], root_directory, debug)
+    # Generate all secrets first, so missing fixed secrets abort before the existing env files are removed
+    secrets = handler.generate_secrets(target_servers, root_directory, debug)
     click.echo("\n")
 
-    # Generate all secrets
-    secrets = handler.generate_secrets(target_servers, root_directory, debug)
+    # Cleanup handler and secrets folder 
+    handler.clean(target, root_directory, debug)
+    remove_env_files([server.name for server in target_servers], root_directory, debug)
     click.echo("\n")
 
     # Create env files for the target servers
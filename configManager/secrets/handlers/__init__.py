@@ -1,30 +1,114 @@
 from abc import ABC, abstractmethod
-from typing import TypedDict, List, Optional
-from ...parseServerConfig import Server
+from typing import List, Optional, Iterable, Iterator, Tuple
+import sys
 
+from ...parseServerConfig import Server, FrozenModel, intern_all
 
-class KeyValuePair(TypedDict):
-    key: str
-    value: str
 
+class KeyValuePair(FrozenModel):
+    __slots__ = ('key', 'value')
 
-# Typed Dict which encorporates Key Value Pairs for Secrets
-class KV_ContainerSecrets(TypedDict):
-    public: Optional[List[KeyValuePair]]
-    private: Optional[List[KeyValuePair]]
-    fixed: Optional[List[KeyValuePair]]
+    def __init__(self, key: str, value: str):
+        self._init_slot('key', sys.intern(key))
+        self._init_slot('value', value)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KeyValuePair':
+        return cls(data["key"], data["value"])
 
-# Typed Dict which encorporates Key Value Pairs for Secrets
-class KV_Container(TypedDict):
-    name: str
-    secrets: KV_ContainerSecrets
+    def to_dict(self) -> dict:
+        return {"key": self.key, "value": self.value}
 
 
-# Typed Dict which encorporates Key Value Pairs for Secrets
-class KV_Server(TypedDict):
-    name: str
-    containers: List[KV_Container]
+# Model which encorporates Key Value Pairs for Secrets
+# Keys and values of each category are stored as parallel tuples instead of one object per secret
+class KV_ContainerSecrets(FrozenModel):
+    __slots__ = ('public_keys', 'public_values', 'private_keys', 'private_values', 'fixed_keys', 'fixed_values')
+    categories = ('public', 'private', 'fixed')
+
+    def __init__(self, public_keys: Iterable[str] = (), public_values: Iterable[str] = (),
+                 private_keys: Iterable[str] = (), private_values: Iterable[str] = (),
+                 fixed_keys: Iterable[str] = (), fixed_values: Iterable[str] = ()):
+        for category, keys, values in (('public', public_keys, public_values),
+                                       ('private', private_keys, private_values),
+                                       ('fixed', fixed_keys, fixed_values)):
+            keys = intern_all(keys)
+            values = tuple(values) if values else ()
+            if len(keys) != len(values):
+                raise ValueError(f"Got {len(keys)} keys but {len(values)} values for {category} secrets")
+            self._init_slot(f'{category}_keys', keys)
+            self._init_slot(f'{category}_values', values)
+
+    @classmethod
+    def from_pairs(cls, public: Optional[Iterable[KeyValuePair]] = None,
+                   private: Optional[Iterable[KeyValuePair]] = None,
+                   fixed: Optional[Iterable[KeyValuePair]] = None) -> 'KV_ContainerSecrets':
+        arrays = []
+        for pairs in (public, private, fixed):
+            pairs = list(pairs) if pairs else []
+            arrays.append([pair.key for pair in pairs])
+            arrays.append([pair.value for pair in pairs])
+        return cls(*arrays)
+
+    def items(self, category: str) -> Iterator[Tuple[str, str]]:
+        """Iterates over the (key, value) tuples of a category without creating KeyValuePair objects"""
+        return zip(getattr(self, f'{category}_keys'), getattr(self, f'{category}_values'))
+
+    def pairs(self, category: str) -> List[KeyValuePair]:
+        return [KeyValuePair(key, value) for key, value in self.items(category)]
+
+    @property
+    def public(self) -> List[KeyValuePair]:
+        return self.pairs('public')
+
+    @property
+    def private(self) -> List[KeyValuePair]:
+        return self.pairs('private')
+
+    @property
+    def fixed(self) -> List[KeyValuePair]:
+        return self.pairs('fixed')
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KV_ContainerSecrets':
+        return cls.from_pairs(*[[KeyValuePair.from_dict(pair) for pair in data.get(category) or []]
+                                for category in cls.categories])
+
+    def to_dict(self) -> dict:
+        return {category: [{"key": key, "value": value} for key, value in self.items(category)]
+                for category in self.categories}
+
+
+# Model which encorporates Key Value Pairs for Secrets
+class KV_Container(FrozenModel):
+    __slots__ = ('name', 'secrets')
+
+    def __init__(self, name: str, secrets: KV_ContainerSecrets):
+        self._init_slot('name', sys.intern(name))
+        self._init_slot('secrets', secrets)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KV_Container':
+        return cls(data["name"], KV_ContainerSecrets.from_dict(data["secrets"]))
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "secrets": self.secrets.to_dict()}
+
+
+# Model which encorporates Key Value Pairs for Secrets
+class KV_Server(FrozenModel):
+    __slots__ = ('name', 'containers')
+
+    def __init__(self, name: str, containers: Iterable[KV_Container] = ()):
+        self._init_slot('name', sys.intern(name))
+        self._init_slot('containers', tuple(containers))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KV_Server':
+        return cls(data["name"], [KV_Container.from_dict(container) for container in data["containers"]])
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "containers": [container.to_dict() for container in self.containers]}
 
 
 class SecretHandler(ABC):
@@ -41,6 +125,10 @@ class SecretHandler(ABC):
     def publish_public_secrets(self, kv_server_config: List[KV_Server], root_directory: str, debug: bool) -> None:
         pass
 
+    @abstractmethod
+    def store_fixed_secrets(self, kv_server_config: List[KV_Server], root_directory: str, debug: bool) -> None:
+        pass
+
     @abstractmethod
     def clean(self, target: str, root_directory: str, debug: bool) -> None:
         pass
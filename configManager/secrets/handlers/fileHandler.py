@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Sequence
 import os
 import subprocess
 import secrets as secrets_lib
@@ -10,6 +10,7 @@ from ...parseServerConfig import Server
 from ... import all_servers_option
 
 public_secrets_file_name = "publicSecrets.txt"
+fixed_secrets_file_name = "fixed_secrets.txt"
 
 
 class FileSecretHandler(SecretHandler):
@@ -18,24 +19,19 @@ class FileSecretHandler(SecretHandler):
         return 'file'
 
     @staticmethod
-    def _read_fixed_secrets(root_directory: str, server_name: str, container_name: str, fixed_secrets: [str],
+    def _read_fixed_secrets(root_directory: str, server_name: str, container_name: str, fixed_secrets: Sequence[str],
                             debug: bool) -> List[KeyValuePair]:
         if len(fixed_secrets) < 1:
             if debug:
                 click.secho(f"Skipping fixed secrets. No fixed secrets necessary for {server_name} - {container_name}")
             return []
         
-        fixed_secret_file_path = os.path.join(root_directory, 'fixed_secrets.txt')
+        fixed_secret_file_path = os.path.join(root_directory, fixed_secrets_file_name)
 
-        # Ensure the file exists and can be opened
-        try:
-            with open(fixed_secret_file_path, 'r'):
-                pass
-        except Exception as e:
-            click.secho(f"Could not open file {fixed_secret_file_path} from cwd {os.getcwd()}", fg='red', bold=True,
-                        err=True)
-            click.echo(e, err=True)
-            raise FileNotFoundError('Could not open fixed secrets file.')
+        # A missing file is reported together with all other missing fixed secrets by generate_secrets
+        if not os.path.exists(fixed_secret_file_path):
+            click.secho(f"There is no fixed secrets file at {fixed_secret_file_path}", fg='yellow', bold=True)
+            return []
 
         # Make sure the fixed_secrets.txt file is protected with required root access
         subprocess.check_call(['sudo', 'chmod', '700', fixed_secret_file_path])
@@ -57,8 +53,8 @@ class FileSecretHandler(SecretHandler):
                 elif headline_reached and stripped_line.startswith('#'):
                     click.secho(f"Could not find all fixed secrets for {server_name}-{container_name}: {fixed_secrets}",
                                 fg="yellow", bold=True)
-                    break
-                elif headline_reached:
+                    return kv_fixed_secrets
+                elif headline_reached and stripped_line:
                     split_secret = [kv.strip() for kv in stripped_line.split('=')]
                     secret_name = split_secret[0]
                     secret_value = split_secret[1]
@@ -68,40 +64,50 @@ class FileSecretHandler(SecretHandler):
                             f"Fixed secret {secret_name} is present in the fixed_secrets file but not listed as requirement for {server_name}-{container_name}",
                             fg='yellow', bold=True)
                     else:
-                        secret: KeyValuePair = {"key": secret_name, "value": secret_value}
-                        kv_fixed_secrets.append(secret)
+                        kv_fixed_secrets.append(KeyValuePair(secret_name, secret_value))
 
                         if len(kv_fixed_secrets) == len(fixed_secrets):
                             if debug:
                                 click.secho(f"Finished reading all secrets for {server_name}-{container_name}")
                             return kv_fixed_secrets
-            click.secho(f"Could not find necessary secret headline for {server_name}{container_name}", fg='yellow', bold=True)
+        if not headline_reached:
+            click.secho(f"Could not find necessary secret headline for {server_name}{container_name}", fg='yellow',
+                        bold=True)
+        return kv_fixed_secrets
 
     def generate_secrets(self, server_config: List[Server], root_directory: str, debug: bool) -> List[KV_Server]:
         generated_secrets = []
+        incomplete = False
 
         for server in server_config:
             kv_containers: List[KV_Container] = []
-            for container in server['containers']:
-                secrets: KV_ContainerSecrets = {
-                    "public": list(map(lambda x: {"key": x, "value": secrets_lib.token_hex(32)},
-                                       container['secrets'].get('public', []))),
-                    "private": list(map(lambda x: {"key": x, "value": secrets_lib.token_hex(32)},
-                                        container['secrets'].get('private', []))),
-                    "fixed": FileSecretHandler._read_fixed_secrets(root_directory, server["name"], container["name"],
-                                                                   container['secrets'].get('fixed', []), debug)
-                }
-
-                kv_container: KV_Container = {
-                    "name": container["name"],
-                    "secrets": secrets
-                }
-                kv_containers.append(kv_container)
-            server: KV_Server = {
-                "name": server["name"],
-                "containers": kv_containers
-            }
-            generated_secrets.append(server)
+            for container in server.containers:
+                # The key tuples of the server config are shared, only the values are newly allocated
+                fixed_secrets = FileSecretHandler._read_fixed_secrets(root_directory, server.name, container.name,
+                                                                      container.secrets.fixed, debug)
+                missing = set(container.secrets.fixed) - {secret.key for secret in fixed_secrets}
+                if len(missing) > 0:
+                    click.secho(f"Missing fixed secrets {sorted(missing)} for {server.name} - {container.name} in "
+                                f"{os.path.join(root_directory, fixed_secrets_file_name)}", fg='red', err=True,
+                                bold=True)
+                    incomplete = True
+                secrets = KV_ContainerSecrets(
+                    public_keys=container.secrets.public,
+                    public_values=[secrets_lib.token_hex(32) for _ in container.secrets.public],
+                    private_keys=container.secrets.private,
+                    private_values=[secrets_lib.token_hex(32) for _ in container.secrets.private],
+                    fixed_keys=[secret.key for secret in fixed_secrets],
+                    fixed_values=[secret.value for secret in fixed_secrets]
+                )
+                kv_containers.append(KV_Container(container.name, secrets))
+            generated_secrets.append(KV_Server(server.name, kv_containers))
+
+        # Env files without the fixed secrets would start the containers half configured
+        if incomplete:
+            click.secho("Add the missing fixed secrets to the fixed secrets file. Hardware dependent settings "
+                        "(tuning_* env files) are stored by 'python -m configManager.tune <server> --write true'.",
+                        fg='red', err=True, bold=True)
+            raise ValueError("Fixed secrets are missing")
         return generated_secrets
 
     def publish_public_secrets(self, kv_server_config: List[KV_Server], root_directory: str, debug: bool) -> None:
@@ -125,19 +131,18 @@ class FileSecretHandler(SecretHandler):
             try:
                 with open(public_secrets_file_path, 'a') as public_secrets_file:
                     for server in kv_server_config:
-                        for container in server["containers"]:
-                            public_secrets = container["secrets"]["public"]
-                            if public_secrets and len(public_secrets) > 0:
+                        for container in server.containers:
+                            if len(container.secrets.public_keys) > 0:
                                 # Write headline
-                                public_secrets_file.write(f'# {server["name"]} - {container["name"]}\n')
+                                public_secrets_file.write(f'# {server.name} - {container.name}\n')
 
                                 # Write secrets
-                                for secret in public_secrets:
-                                    public_secrets_file.write(f'{secret["key"]}={secret["value"]}\n')
+                                for key, value in container.secrets.items('public'):
+                                    public_secrets_file.write(f'{key}={value}\n')
                                 public_secrets_file.write('\n')
                             elif debug:
                                 click.secho(
-                                    f'Skipping public secret publishing for {server["name"]}-{container["name"]}. No public secrets available/needed')
+                                    f'Skipping public secret publishing for {server.name}-{container.name}. No public secrets available/needed')
             except Exception as e:
                 click.secho("Could not publish public secrets into public secrets file. Some error occurred.", fg='red',
                             err=True, bold=True)
@@ -146,6 +151,43 @@ class FileSecretHandler(SecretHandler):
             finally:
                 spinner.update(1)
 
+    def store_fixed_secrets(self, kv_server_config: List[KV_Server], root_directory: str, debug: bool) -> None:
+        fixed_secret_file_path = os.path.join(root_directory, fixed_secrets_file_name)
+        headlines = {f"# {server.name} - {container.name}" for server in kv_server_config
+                     for container in server.containers}
+
+        lines = []
+        if os.path.exists(fixed_secret_file_path):
+            with open(fixed_secret_file_path, 'r') as fixed_secrets_file:
+                lines = fixed_secrets_file.read().split('\n')
+
+        # Remove the sections of the containers which are stored again and keep all other fixed secrets
+        kept_lines = []
+        skipping = False
+        for line in lines:
+            if line.strip().startswith('#'):
+                skipping = line.strip() in headlines
+            if not skipping:
+                kept_lines.append(line)
+            elif debug:
+                click.secho(f"Replacing fixed secrets line: {line.split('=')[0]}")
+        while len(kept_lines) > 0 and not kept_lines[-1].strip():
+            kept_lines.pop()
+
+        for server in kv_server_config:
+            for container in server.containers:
+                if len(kept_lines) > 0:
+                    kept_lines.append('')
+                kept_lines.append(f"# {server.name} - {container.name}")
+                kept_lines.extend(f"{key}={value}" for key, value in container.secrets.items('fixed'))
+
+        with open(fixed_secret_file_path, 'w') as fixed_secrets_file:
+            fixed_secrets_file.write('\n'.join(kept_lines) + '\n')
+
+        # Make sure the fixed_secrets.txt file is protected with required root access
+        subprocess.check_call(['sudo', 'chmod', '700', fixed_secret_file_path])
+        click.secho(f"Stored fixed secrets in {fixed_secret_file_path}", fg='green')
+
     # TODO: Enable this to be target specific; (will currently only enable you to clean all public secrets)
     def clean(self, target: str, root_directory: str, debug: bool) -> None:
         click.secho(
@@ -0,0 +1,49 @@
+import os
+
+import click
+
+from .. import default_root_directory, all_servers_option
+from ..composeFile import find_stacks
+from .bench import bench as bench_command, history_file_name, DockerCli
+
+
+def get_stack_names():
+    stack_names = find_stacks(default_root_directory)
+    stack_names.append(all_servers_option)
+    return stack_names
+
+
+@click.command()
+@click.option('--target', default=all_servers_option, required=True, prompt=True, prompt_required=True,
+              type=click.Choice(get_stack_names()))
+@click.option('--recreate', default=False, type=bool, help="Force recreation of the containers")
+@click.option('--timeout', default=600.0, type=float, help="Seconds to wait for a stack to become healthy")
+@click.option('--poll-interval', default=0.25, type=float, help="Initial poll interval in seconds")
+@click.option('--max-poll-interval', default=5.0, type=float, help="Upper bound for the poll backoff in seconds")
+@click.option('--window', default=5, type=int, help="Number of earlier runs to compare against")
+@click.option('--regression-threshold', default=0.2, type=float,
+              help="Relative slowdown against earlier runs which is reported as regression")
+@click.option('--history-file', default=os.path.join(default_root_directory, history_file_name), type=str)
+@click.option('--docker', default='docker', type=str, help="Docker executable (e.g. a fake CLI for testing)")
+@click.option('--compose', default='docker-compose', type=str, help="Compose executable")
+@click.option('--debug', default=False, type=bool)
+def bench(target, recreate, timeout, poll_interval, max_poll_interval, window, regression_threshold, history_file,
+          docker, compose, debug):
+    """Measure time to running and time to healthy for each stack."""
+    click.echo("\n")
+    docker_cli = DockerCli(docker, compose, debug)
+    bench_command(target, docker_cli, default_root_directory, history_file, recreate, timeout, poll_interval,
+                  max_poll_interval, window, regression_threshold, debug)
+
+
+# Define the CLI group
+@click.group()
+def cli():
+    pass
+
+
+# Add the Click commands to the CLI group
+cli.add_command(bench)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,260 @@
+from typing import List, Optional, Dict
+from datetime import datetime
+import json
+import os
+import re
+import shlex
+import statistics
+import subprocess
+import time
+
+import click
+
+from .. import all_servers_option
+from ..composeFile import find_stacks
+from ..parseServerConfig import FrozenModel
+
+history_file_name = "bench-history.jsonl"
+
+# Upper bound of the poll interval relative to the time elapsed since the start of the stack
+max_interval_share = 0.1
+
+# Label docker compose puts on every container it creates
+compose_service_label = "com.docker.compose.service"
+
+# Docker reports times in RFC 3339 with nanoseconds, e.g. 2023-10-01T12:00:00.123456789Z or ...+02:00
+docker_time_pattern = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)$")
+
+
+class ServiceTiming(FrozenModel):
+    """Startup latency of a single compose service in seconds (None if the state was never reached)"""
+    __slots__ = ('name', 'image', 'running', 'healthy', 'has_healthcheck')
+
+    def __init__(self, name: str, image: str, running: Optional[float], healthy: Optional[float],
+                 has_healthcheck: bool):
+        self._init_slot('name', name)
+        self._init_slot('image', image)
+        self._init_slot('running', running)
+        self._init_slot('healthy', healthy)
+        self._init_slot('has_healthcheck', has_healthcheck)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ServiceTiming':
+        return cls(data["name"], data["image"], data["running"], data["healthy"], data["has_healthcheck"])
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class DockerCli:
+    """
+    Thin wrapper around the docker and compose executables
+    Both commands are configurable so a fake docker CLI can be used for testing
+    """
+
+    def __init__(self, docker_command: str, compose_command: str, debug: bool):
+        self.docker_command = shlex.split(docker_command)
+        self.compose_command = shlex.split(compose_command)
+        self.debug = debug
+
+    def _run(self, command: List[str], cwd: Optional[str] = None) -> str:
+        if self.debug:
+            click.secho(f"Running {' '.join(command)} in {cwd or os.getcwd()}")
+        return subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+    def compose_up(self, stack_directory: str, recreate: bool) -> None:
+        command = self.compose_command + ['up', '-d']
+        if recreate:
+            command.append('--force-recreate')
+        self._run(command, cwd=stack_directory)
+
+    def compose_container_ids(self, stack_directory: str) -> List[str]:
+        output = self._run(self.compose_command + ['ps', '-a', '-q'], cwd=stack_directory)
+        return [line.strip() for line in output.splitlines() if line.strip()]
+
+    def inspect(self, container_ids: List[str]) -> List[dict]:
+        if len(container_ids) < 1:
+            return []
+        return json.loads(self._run(self.docker_command + ['inspect'] + container_ids))
+
+
+def _service_name(container: dict) -> str:
+    labels = container.get("Config", {}).get("Labels") or {}
+    return labels.get(compose_service_label) or container.get("Name", "").lstrip('/')
+
+
+def parse_docker_time(value: Optional[str]) -> Optional[float]:
+    """Converts a docker timestamp into a unix timestamp, returns None for the zero time of unset timestamps"""
+    match = docker_time_pattern.match(value or "")
+    if match is None or match.group(1).startswith("0001-"):
+        return None
+    seconds, fraction, zone = match.groups()
+    timestamp = datetime.fromisoformat(seconds + ("+00:00" if zone == "Z" else zone)).timestamp()
+    return timestamp + (float(f"0.{fraction}") if fraction else 0.0)
+
+
+def _first_healthy_probe(health: dict) -> Optional[float]:
+    # Docker keeps the last 5 probes, the first successful one marks the change to healthy
+    for probe in health.get("Log") or []:
+        if probe.get("ExitCode") == 0:
+            return parse_docker_time(probe.get("End"))
+    return None
+
+
+def wait_for_stack(docker: DockerCli, stack_directory: str, start: float, timeout: float,
+                   initial_interval: float, max_interval: float, debug: bool) -> List[ServiceTiming]:
+    """
+    Polls the container states of a stack with exponential backoff until every service is healthy
+    Services without a healthcheck count as healthy as soon as they are running
+    start is the wall clock time before 'up'. The timings are taken from State.StartedAt and the first successful
+    healthcheck probe, as 'up -d' blocks until all containers are started and polls only see the final states.
+    Only if docker does not report a time, the change is timed at the midpoint between the last poll which did not
+    see it and the first which did.
+    Containers which were already running before the start count as running at 0s.
+    """
+    running: Dict[str, Optional[float]] = {}
+    healthy: Dict[str, Optional[float]] = {}
+    images: Dict[str, str] = {}
+    healthchecks: Dict[str, bool] = {}
+    interval = initial_interval
+    previous_poll = start
+
+    while True:
+        container_ids = docker.compose_container_ids(stack_directory)
+        # The states are observed while docker inspect runs, so its midpoint is used as time of this poll
+        inspect_start = time.time()
+        containers = docker.inspect(container_ids)
+        now = (inspect_start + time.time()) / 2
+        observed = (previous_poll + now) / 2 - start
+        for container in containers:
+            service = _service_name(container)
+            state = container.get("State", {})
+            health = state.get("Health")
+            images[service] = container.get("Config", {}).get("Image", "")
+            healthchecks[service] = health is not None
+            running.setdefault(service, None)
+            healthy.setdefault(service, None)
+
+            if state.get("Status") == "running" and running[service] is None:
+                started_at = parse_docker_time(state.get("StartedAt"))
+                running[service] = observed if started_at is None else max(started_at - start, 0.0)
+                if debug:
+                    click.secho(f"{service} is running after {running[service]:.2f}s")
+            if running[service] is not None and healthy[service] is None:
+                if health is None or health.get("Status") == "healthy":
+                    # A service without healthcheck is healthy at the same moment it is running
+                    if health is None:
+                        healthy[service] = running[service]
+                    else:
+                        probe_end = _first_healthy_probe(health)
+                        healthy[service] = observed if probe_end is None else max(probe_end - start, running[service])
+                    if debug:
+                        click.secho(f"{service} is healthy after {healthy[service]:.2f}s")
+
+        if len(healthy) > 0 and all(value is not None for value in healthy.values()):
+            break
+        if now - start >= timeout:
+            click.secho(f"Timed out after {timeout}s waiting for {stack_directory} to become healthy",
+                        fg='yellow', bold=True)
+            break
+
+        previous_poll = now
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval, max(initial_interval, max_interval_share * (now - start)))
+
+    return [ServiceTiming(service, images[service], running[service], healthy[service], healthchecks[service])
+            for service in sorted(running)]
+
+
+def bench_stack(docker: DockerCli, root_directory: str, stack: str, recreate: bool, timeout: float,
+                initial_interval: float, max_interval: float, debug: bool) -> List[ServiceTiming]:
+    stack_directory = os.path.join(root_directory, stack)
+    click.secho(f"Starting stack {stack}", fg='cyan', bold=True)
+
+    # Wall clock time, as the timestamps reported by docker are compared against it
+    start = time.time()
+    docker.compose_up(stack_directory, recreate)
+    return wait_for_stack(docker, stack_directory, start, timeout, initial_interval, max_interval, debug)
+
+
+def read_history(history_file_path: str) -> List[dict]:
+    if not os.path.exists(history_file_path):
+        return []
+
+    history = []
+    with open(history_file_path, 'r') as history_file:
+        for line in history_file:
+            if line.strip():
+                history.append(json.loads(line))
+    return history
+
+
+def append_history(history_file_path: str, stack: str, recreate: bool, timings: List[ServiceTiming]) -> None:
+    record = {
+        "stack": stack,
+        "timestamp": time.time(),
+        "recreate": recreate,
+        "services": [timing.to_dict() for timing in timings]
+    }
+    with open(history_file_path, 'a') as history_file:
+        history_file.write(json.dumps(record) + "\n")
+
+
+def _format_seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def print_comparison(stack: str, recreate: bool, timings: List[ServiceTiming], history: List[dict], window: int,
+                     regression_threshold: float) -> None:
+    """
+    Compares the timings of this run with the median of the last runs of the same stack
+    Only runs with the same recreate setting are comparable, as 'up -d' on a running stack returns immediately
+    """
+    previous_runs = [record for record in history
+                     if record["stack"] == stack and record["recreate"] == recreate][-window:]
+
+    click.secho(f"\nTime to healthy for {stack} (compared to the median of {len(previous_runs)} earlier runs)",
+                fg='cyan', bold=True)
+    for timing in timings:
+        previous = [ServiceTiming.from_dict(service) for record in previous_runs for service in record["services"]
+                    if service["name"] == timing.name]
+        previous_healthy = [service.healthy for service in previous if service.healthy is not None]
+        line = (f"  {timing.name:<24} running {_format_seconds(timing.running):>9}"
+                f"   healthy {_format_seconds(timing.healthy):>9}")
+
+        if len(previous_healthy) < 1 or timing.healthy is None:
+            click.echo(line)
+            continue
+
+        baseline = statistics.median(previous_healthy)
+        change = (timing.healthy - baseline) / baseline if baseline > 0 else 0.0
+        line += f"   median {_format_seconds(baseline):>9} ({change:+.0%})"
+        if previous[-1].image != timing.image:
+            line += f"   image {previous[-1].image} -> {timing.image}"
+
+        if change > regression_threshold:
+            click.secho(line, fg='red', bold=True)
+        else:
+            click.echo(line)
+
+
+def bench(target: str, docker: DockerCli, root_directory: str, history_file_path: str, recreate: bool,
+          timeout: float, initial_interval: float, max_interval: float, window: int, regression_threshold: float,
+          debug: bool) -> Dict[str, List[ServiceTiming]]:
+    stacks = find_stacks(root_directory)
+    if target != all_servers_option:
+        if target not in stacks:
+            click.secho(f"Could not find a stack '{target}' in {root_directory}.", err=True, fg='red', bold=True)
+            raise ValueError(f"Target stack {target} could not be found")
+        stacks = [target]
+
+    history = read_history(history_file_path)
+    results = {}
+    for stack in stacks:
+        timings = bench_stack(docker, root_directory, stack, recreate, timeout, initial_interval, max_interval, debug)
+        print_comparison(stack, recreate, timings, history, window, regression_threshold)
+        append_history(history_file_path, stack, recreate, timings)
+        results[stack] = timings
+
+    click.secho(f"\nStored results in {history_file_path}", fg='bright_green', bold=True)
+    return results
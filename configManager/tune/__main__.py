@@ -0,0 +1,40 @@
+import click
+
+from .. import default_root_directory
+from ..utils import check_run_with_root
+from ..secrets.handlers.handlerManager import handler_names, get_hander_by_name
+from .host import read_host_resources, default_meminfo_path
+from .nextcloud import tune_nextcloud
+
+
+@click.command()
+@click.option('--memory-share', default=0.5, type=click.FloatRange(0, 1, min_open=True),
+              help="Share of the host memory the nextcloud stack may use")
+@click.option('--cpus', default=None, type=click.IntRange(min=1), help="Number of cpus (defaults to the host cpus)")
+@click.option('--meminfo', default=default_meminfo_path, type=click.Path(exists=True, dir_okay=False))
+@click.option('--redis-policy', default='allkeys-lru',
+              type=click.Choice(['allkeys-lru', 'allkeys-lfu', 'volatile-lru', 'volatile-lfu', 'noeviction']))
+@click.option('--handler', default=handler_names[0], type=click.Choice(handler_names))
+@click.option('--write', default=False, type=bool, help="Store the settings as fixed secrets of the stack")
+@click.option('--debug', default=False, type=bool)
+def nextcloud(memory_share, cpus, meminfo, redis_policy, handler, write, debug):
+    """Tune mysql, php, apache and redis of the nextcloud stack for the host hardware."""
+    click.echo("\n")
+    if write:
+        check_run_with_root()
+    host = read_host_resources(meminfo, cpus)
+    handler_instance = get_hander_by_name(handler)
+    tune_nextcloud(host, handler_instance, default_root_directory, memory_share, redis_policy, write, debug)
+
+
+# Define the CLI group
+@click.group()
+def cli():
+    pass
+
+
+# Add the Click commands to the CLI group
+cli.add_command(nextcloud)
+
+if __name__ == '__main__':
+    cli()
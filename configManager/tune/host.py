@@ -0,0 +1,32 @@
+from typing import Optional
+import os
+
+from ..parseServerConfig import FrozenModel
+
+default_meminfo_path = "/proc/meminfo"
+
+kibibyte = 1024
+mebibyte = 1024 * kibibyte
+gibibyte = 1024 * mebibyte
+
+
+class HostResources(FrozenModel):
+    """Memory in bytes and number of cpus of the host the stacks run on"""
+    __slots__ = ('memory', 'cpus')
+
+    def __init__(self, memory: int, cpus: int):
+        self._init_slot('memory', memory)
+        self._init_slot('cpus', cpus)
+
+
+def read_total_memory(meminfo_path: str) -> int:
+    with open(meminfo_path, 'r') as meminfo_file:
+        for line in meminfo_file:
+            if line.startswith('MemTotal:'):
+                # The line has the format "MemTotal:       16314736 kB"
+                return int(line.split()[1]) * kibibyte
+    raise ValueError(f"Could not find MemTotal in {meminfo_path}")
+
+
+def read_host_resources(meminfo_path: str = default_meminfo_path, cpus: Optional[int] = None) -> HostResources:
+    return HostResources(read_total_memory(meminfo_path), cpus or os.cpu_count() or 1)
@@ -0,0 +1,155 @@
+from typing import Dict
+import os
+
+import click
+
+from ..parseServerConfig import parse_server_config
+from ..secrets.handlers import SecretHandler, KV_Server, KV_Container, KV_ContainerSecrets
+from .host import HostResources, mebibyte, gibibyte
+
+server_name = "nextcloud"
+
+# Env files (declared as fixed secrets in needed-secrets.yaml) which receive the tuned values
+app_env_file = "tuning_app"
+db_env_file = "tuning_db"
+redis_env_file = "tuning_redis"
+
+# Share of the memory available to the stack which is given to each component
+innodb_buffer_pool_share = 0.4
+php_workers_share = 0.35
+opcache_share = 0.04
+apcu_share = 0.02
+redis_share = 0.05
+
+# memory_limit is a ceiling for single requests (e.g. previews or uploads), not memory every worker reserves
+# Nextcloud recommends 512M and warns below it, it is only lowered if the whole php share is smaller
+recommended_php_memory_limit = 512 * mebibyte
+min_php_memory_limit = 128 * mebibyte
+# Average resident memory of an apache/mod_php worker serving nextcloud
+apache_worker_memory = 64 * mebibyte
+min_apache_workers = 8
+# Apache prefork can not run more workers than its default ServerLimit
+max_apache_workers = 256
+
+# InnoDB allocates the buffer pool in chunks of innodb_buffer_pool_chunk_size
+innodb_chunk_size = 128 * mebibyte
+
+
+def _clamp(value: int, lower: int, upper: int) -> int:
+    return max(lower, min(value, upper))
+
+
+def _round_down(value: int, step: int) -> int:
+    return value // step * step
+
+
+def _mebibytes(value: int) -> int:
+    return value // mebibyte
+
+
+def tune(host: HostResources, memory_share: float, redis_policy: str) -> Dict[str, Dict[str, str]]:
+    """
+    Derives the tuned settings of the nextcloud stack from the host resources, grouped by env file
+    Warns if the expected memory usage of the components exceeds the memory available to the stack
+    """
+    memory = int(host.memory * memory_share)
+
+    buffer_pool = max(innodb_chunk_size, _round_down(int(memory * innodb_buffer_pool_share), innodb_chunk_size))
+    buffer_pool_instances = _clamp(buffer_pool // gibibyte, 1, 8)
+    redo_log_capacity = _clamp(buffer_pool // 4, 100 * mebibyte, 4 * gibibyte)
+
+    # The workers are sized by their average resident memory, a single request may still use up to memory_limit
+    php_memory = int(memory * php_workers_share)
+    workers = _clamp(php_memory // apache_worker_memory, min_apache_workers, max_apache_workers)
+    memory_limit = _clamp(_round_down(php_memory, 32 * mebibyte), min_php_memory_limit,
+                          recommended_php_memory_limit)
+    if memory_limit < recommended_php_memory_limit:
+        click.secho(f"The php share of {_mebibytes(php_memory)} MiB is too small for the recommended memory_limit "
+                    f"of {_mebibytes(recommended_php_memory_limit)}M, using {_mebibytes(memory_limit)}M.",
+                    fg='yellow', bold=True)
+    spare_servers = _clamp(host.cpus, 2, workers)
+
+    # opcache and APCu are shared memory of all workers
+    opcache_memory = _clamp(_round_down(int(memory * opcache_share), 16 * mebibyte), 64 * mebibyte, 512 * mebibyte)
+    interned_strings_buffer = _clamp(_mebibytes(opcache_memory) // 8, 8, 64)
+    apcu_memory = _clamp(_round_down(int(memory * apcu_share), 16 * mebibyte), 32 * mebibyte, 256 * mebibyte)
+
+    redis_memory = _clamp(int(memory * redis_share), 64 * mebibyte, gibibyte)
+
+    total = buffer_pool + workers * apache_worker_memory + opcache_memory + apcu_memory + redis_memory
+    if total > memory:
+        click.secho(f"The expected memory usage of the settings adds up to {_mebibytes(total)} MiB, which exceeds the "
+                    f"{_mebibytes(memory)} MiB available to {server_name}. Increase --memory-share or expect "
+                    f"swapping under load.", fg='yellow', bold=True)
+
+    return {
+        app_env_file: {
+            "PHP_MEMORY_LIMIT": f"{_mebibytes(memory_limit)}M",
+            "PHP_OPCACHE_MEMORY_CONSUMPTION": str(_mebibytes(opcache_memory)),
+            "PHP_OPCACHE_INTERNED_STRINGS_BUFFER": str(interned_strings_buffer),
+            "PHP_OPCACHE_MAX_ACCELERATED_FILES": "10000" if opcache_memory < 256 * mebibyte else "20000",
+            "PHP_APCU_SHM_SIZE": f"{_mebibytes(apcu_memory)}M",
+            "APACHE_START_SERVERS": str(spare_servers),
+            "APACHE_MIN_SPARE_SERVERS": str(spare_servers),
+            "APACHE_MAX_SPARE_SERVERS": str(_clamp(2 * spare_servers, spare_servers, workers)),
+            "APACHE_MAX_REQUEST_WORKERS": str(workers)
+        },
+        db_env_file: {
+            "INNODB_BUFFER_POOL_SIZE": f"{_mebibytes(buffer_pool)}M",
+            "INNODB_BUFFER_POOL_INSTANCES": str(buffer_pool_instances),
+            "INNODB_REDO_LOG_CAPACITY": f"{_mebibytes(redo_log_capacity)}M",
+            # Every apache worker may hold a connection, the rest is left for cron and maintenance
+            "MYSQL_MAX_CONNECTIONS": str(workers + 20)
+        },
+        redis_env_file: {
+            "REDIS_MAXMEMORY": f"{_mebibytes(redis_memory)}mb",
+            "REDIS_MAXMEMORY_POLICY": redis_policy
+        }
+    }
+
+
+def to_kv_server(settings: Dict[str, Dict[str, str]]) -> KV_Server:
+    containers = [KV_Container(env_file, KV_ContainerSecrets(fixed_keys=values.keys(), fixed_values=values.values()))
+                  for env_file, values in settings.items()]
+    return KV_Server(server_name, containers)
+
+
+def check_declared(settings: Dict[str, Dict[str, str]], root_directory: str, debug: bool) -> bool:
+    """Checks that every tuned value is declared as fixed secret in the needed-secrets.yaml of the stack"""
+    server = parse_server_config(os.path.join(root_directory, server_name), server_name, debug)
+    declared = {container.name: set(container.secrets.fixed) for container in server.containers}
+
+    valid = True
+    for env_file, values in settings.items():
+        missing = set(values) - declared.get(env_file, set())
+        if len(missing) > 0:
+            click.secho(f"{server_name}-{env_file} does not declare the fixed secrets {sorted(missing)} in "
+                        f"needed-secrets.yaml", fg='red', err=True, bold=True)
+            valid = False
+    return valid
+
+
+def print_settings(host: HostResources, settings: Dict[str, Dict[str, str]]) -> None:
+    click.secho(f"Host: {host.memory / gibibyte:.1f} GiB memory, {host.cpus} cpus", fg='cyan', bold=True)
+    for env_file, values in settings.items():
+        click.secho(f"\n# {server_name} - {env_file}", bold=True)
+        for key, value in values.items():
+            click.echo(f"{key}={value}")
+
+
+def tune_nextcloud(host: HostResources, handler: SecretHandler, root_directory: str, memory_share: float,
+                   redis_policy: str, write: bool, debug: bool) -> None:
+    settings = tune(host, memory_share, redis_policy)
+    print_settings(host, settings)
+    click.echo("\n")
+
+    if not check_declared(settings, root_directory, debug):
+        raise ValueError(f"Tuned settings are not declared in the needed-secrets.yaml of {server_name}")
+
+    if not write:
+        click.secho("Run with --write true to store the settings as fixed secrets", fg='cyan')
+        return
+
+    handler.store_fixed_secrets([to_kv_server(settings)], root_directory, debug)
+    click.secho(f"Run 'python -m configManager.secrets generate --target {server_name}' and restart the stack "
+                f"to apply the settings", fg='bright_green', bold=True)
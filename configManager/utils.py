@@ -1,11 +1,14 @@
 from typing import List
 import os
+import re
 
 import click
 
 from . import all_servers_option
 from .parseServerConfig import Server
 
+_duration_units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
 
 def check_run_with_root():
     if os.getuid() != 0:  # Check if the script is executed with root rights
@@ -18,9 +21,17 @@ def filter_server_config_by_target(target: str, server_config: List[Server]) ->
         return server_config
 
     for server in server_config:
-        if server["name"] == target and len(server["containers"]) > 0:
+        if server.name == target and len(server.containers) > 0:
             return [server]
 
     click.secho(f"Could not find a target server '{target}' in the provided server config.", err=True, fg='red',
                 bold=True)
     raise ValueError(f"Target server {target} could not be found in the server config")
+
+
+def parse_duration(duration: str) -> int:
+    """Parses a prometheus style duration like 30s, 12h or 2w into seconds"""
+    match = re.fullmatch(r"(\d+)([smhdw])", duration.strip())
+    if not match:
+        raise click.BadParameter(f"Invalid duration '{duration}'. Expected e.g. 30s, 12h, 14d or 2w")
+    return int(match.group(1)) * _duration_units[match.group(2)]
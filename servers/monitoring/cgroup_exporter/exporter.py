@@ -0,0 +1,260 @@
+"""
+Lightweight container metrics exporter for cgroup v2
+Reads cpu.stat, memory.current, memory.stat and io.stat of all docker compose containers and serves them in the
+prometheus text format. Metric and label names follow cAdvisor so existing queries and dashboards keep working.
+Only the python standard library is used to keep the image small.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+# Parent directories in which docker creates the container cgroups (systemd and cgroupfs cgroup driver)
+container_directories = (
+    ("system.slice", re.compile(r"^docker-([0-9a-f]{64})\.scope$")),
+    ("docker", re.compile(r"^([0-9a-f]{64})$"))
+)
+
+compose_project_label = "com.docker.compose.project"
+compose_service_label = "com.docker.compose.service"
+
+# cgroup files are small, one read of this size always returns the complete content
+read_size = 64 * 1024
+
+metric_families = (
+    ("container_cpu_usage_seconds_total", "counter", "Cumulative cpu time consumed in seconds."),
+    ("container_cpu_user_seconds_total", "counter", "Cumulative user cpu time consumed in seconds."),
+    ("container_cpu_system_seconds_total", "counter", "Cumulative system cpu time consumed in seconds."),
+    ("container_memory_usage_bytes", "gauge", "Current memory usage in bytes, including all memory."),
+    ("container_memory_working_set_bytes", "gauge", "Current working set in bytes."),
+    ("container_fs_reads_bytes_total", "counter", "Cumulative count of bytes read."),
+    ("container_fs_writes_bytes_total", "counter", "Cumulative count of bytes written."),
+    ("container_fs_reads_total", "counter", "Cumulative count of reads completed."),
+    ("container_fs_writes_total", "counter", "Cumulative count of writes completed."),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _parse_flat_keyed(content: str) -> Dict[str, int]:
+    """Parses cgroup files with one 'key value' pair per line (cpu.stat, memory.stat)"""
+    values = {}
+    for line in content.splitlines():
+        key, _, value = line.partition(' ')
+        if value:
+            values[key] = int(value)
+    return values
+
+
+class DockerConfigLabels:
+    """
+    Reads the name and labels of a container from the config.v2.json docker keeps in its containers directory
+    A read-only mount of this directory is enough, unlike the docker socket which grants control over the host
+    """
+
+    def __init__(self, containers_directory: str):
+        self.containers_directory = containers_directory
+
+    def lookup(self, container_id: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        try:
+            with open(os.path.join(self.containers_directory, container_id, "config.v2.json"), 'r') as config_file:
+                container = json.load(config_file)
+        except FileNotFoundError:
+            return None
+        return container["Name"].lstrip('/'), container["Config"].get("Labels") or {}
+
+
+class FileLabels:
+    """Reads container names and labels from a json file ({id: {"name": ..., "labels": {...}}}), e.g. for tests"""
+
+    def __init__(self, labels_file_path: str):
+        with open(labels_file_path, 'r') as labels_file:
+            self.containers = json.load(labels_file)
+
+    def lookup(self, container_id: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        container = self.containers.get(container_id)
+        if container is None:
+            return None
+        return container["name"], container.get("labels") or {}
+
+
+class ContainerCgroup:
+    """
+    The cgroup of a single container
+    The cgroup files are opened once and re-read with pread on every scrape, which regenerates their content
+    without the open/close syscalls and path lookups of every scrape
+    """
+    __slots__ = ('path', 'label_text', 'file_descriptors')
+
+    def __init__(self, path: str, label_text: str):
+        self.path = path
+        self.label_text = label_text
+        self.file_descriptors: Dict[str, int] = {}
+
+    def read(self, file_name: str) -> str:
+        file_descriptor = self.file_descriptors.get(file_name)
+        if file_descriptor is None:
+            file_descriptor = os.open(os.path.join(self.path, file_name), os.O_RDONLY)
+            self.file_descriptors[file_name] = file_descriptor
+        return os.pread(file_descriptor, read_size, 0).decode()
+
+    def close(self) -> None:
+        for file_descriptor in self.file_descriptors.values():
+            os.close(file_descriptor)
+        self.file_descriptors.clear()
+
+
+class CgroupCollector:
+    def __init__(self, cgroup_root: str, label_source):
+        self.cgroup_root = cgroup_root
+        self.label_source = label_source
+        # Cgroups of the compose containers by container id
+        self.containers: Dict[str, ContainerCgroup] = {}
+        # Ids of containers without compose labels, so they are only looked up once
+        self.ignored: set = set()
+
+    def _scan(self) -> Dict[str, str]:
+        found = {}
+        for directory, pattern in container_directories:
+            try:
+                with os.scandir(os.path.join(self.cgroup_root, directory)) as entries:
+                    for entry in entries:
+                        match = pattern.match(entry.name)
+                        if match:
+                            found[match.group(1)] = entry.path
+            except FileNotFoundError:
+                continue
+        return found
+
+    def _label_text(self, container_id: str, path: str) -> Optional[str]:
+        container = self.label_source.lookup(container_id)
+        if container is None:
+            return None
+        name, labels = container
+        if compose_project_label not in labels:
+            return None
+        return (f'container_label_com_docker_compose_project="{_escape(labels[compose_project_label])}",'
+                f'container_label_com_docker_compose_service="{_escape(labels.get(compose_service_label, ""))}",'
+                f'id="{_escape("/" + os.path.relpath(path, self.cgroup_root))}",name="{_escape(name)}"')
+
+    def refresh(self) -> None:
+        """Updates the known containers, only new containers are looked up and opened"""
+        found = self._scan()
+
+        for container_id in list(self.containers):
+            if container_id not in found:
+                self.containers.pop(container_id).close()
+        self.ignored &= set(found)
+
+        for container_id, path in found.items():
+            if container_id in self.containers or container_id in self.ignored:
+                continue
+            try:
+                label_text = self._label_text(container_id, path)
+            except (OSError, ValueError, KeyError) as e:
+                # Failed lookups are retried on the next scrape
+                print(f"Could not look up labels of container {container_id}: {e}", flush=True)
+                continue
+            if label_text is None:
+                self.ignored.add(container_id)
+            else:
+                self.containers[container_id] = ContainerCgroup(path, label_text)
+
+    def _collect_container(self, container: ContainerCgroup, samples: Dict[str, List[str]]) -> None:
+        labels = container.label_text
+        cpu = _parse_flat_keyed(container.read("cpu.stat"))
+        memory_usage = int(container.read("memory.current"))
+        memory = _parse_flat_keyed(container.read("memory.stat"))
+
+        samples["container_cpu_usage_seconds_total"].append(f"{{{labels}}} {cpu['usage_usec'] / 1e6}")
+        samples["container_cpu_user_seconds_total"].append(f"{{{labels}}} {cpu['user_usec'] / 1e6}")
+        samples["container_cpu_system_seconds_total"].append(f"{{{labels}}} {cpu['system_usec'] / 1e6}")
+        samples["container_memory_usage_bytes"].append(f"{{{labels}}} {memory_usage}")
+        samples["container_memory_working_set_bytes"].append(
+            f"{{{labels}}} {max(memory_usage - memory.get('inactive_file', 0), 0)}")
+
+        # io.stat has one line per device: "8:0 rbytes=1 wbytes=2 rios=3 wios=4 dbytes=0 dios=0"
+        for line in container.read("io.stat").splitlines():
+            device, _, fields = line.partition(' ')
+            io = dict(field.split('=', 1) for field in fields.split())
+            device_labels = f'{labels},device="{device}"'
+            samples["container_fs_reads_bytes_total"].append(f"{{{device_labels}}} {io.get('rbytes', 0)}")
+            samples["container_fs_writes_bytes_total"].append(f"{{{device_labels}}} {io.get('wbytes', 0)}")
+            samples["container_fs_reads_total"].append(f"{{{device_labels}}} {io.get('rios', 0)}")
+            samples["container_fs_writes_total"].append(f"{{{device_labels}}} {io.get('wios', 0)}")
+
+    def collect(self) -> str:
+        start = time.perf_counter()
+        self.refresh()
+
+        samples: Dict[str, List[str]] = {name: [] for name, _, _ in metric_families}
+        for container_id, container in list(self.containers.items()):
+            try:
+                self._collect_container(container, samples)
+            except OSError:
+                # The container stopped between the scan and the read
+                self.containers.pop(container_id).close()
+
+        lines = []
+        for name, metric_type, description in metric_families:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(name + sample for sample in samples[name])
+
+        lines.append("# HELP cgroup_exporter_containers Number of exported compose containers.")
+        lines.append("# TYPE cgroup_exporter_containers gauge")
+        lines.append(f"cgroup_exporter_containers {len(self.containers)}")
+        lines.append("# HELP cgroup_exporter_scrape_duration_seconds Time it took to collect the metrics.")
+        lines.append("# TYPE cgroup_exporter_scrape_duration_seconds gauge")
+        lines.append(f"cgroup_exporter_scrape_duration_seconds {time.perf_counter() - start}")
+        return '\n'.join(lines) + '\n'
+
+
+def create_handler(collector: CgroupCollector):
+    # The collector keeps open file descriptors and is not thread safe
+    lock = threading.Lock()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            with lock:
+                body = collector.collect().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports cgroup v2 metrics of docker compose containers")
+    parser.add_argument("--cgroup-root", default="/sys/fs/cgroup")
+    parser.add_argument("--containers-dir", default="/var/lib/docker/containers",
+                        help="Containers directory of docker with the config.v2.json of every container")
+    parser.add_argument("--labels-file", default=None, help="Read container labels from a json file instead")
+    parser.add_argument("--address", default="0.0.0.0")
+    parser.add_argument("--port", default=9338, type=int)
+    args = parser.parse_args()
+
+    label_source = FileLabels(args.labels_file) if args.labels_file else DockerConfigLabels(args.containers_dir)
+    collector = CgroupCollector(args.cgroup_root, label_source)
+    server = ThreadingHTTPServer((args.address, args.port), create_handler(collector))
+    print(f"Serving metrics of {args.cgroup_root} on {args.address}:{args.port}/metrics", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()